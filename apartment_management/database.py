@@ -4,10 +4,518 @@ Vista Verde Apartments - Database Creation Script (UPDATED)
 Includes bill breakdown in payments
 """
 import sqlite3
+import json
+import os
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 DB_NAME = "vista_verde.db"
 
+# Applied once when the shared connection is opened
+CONNECTION_PRAGMAS = '''
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA busy_timeout = 5000;
+    PRAGMA foreign_keys = ON;
+'''
+
+# INSERT ... RETURNING needs SQLite 3.35+; older libraries re-select the row
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# A unit row as the units page lists it
+UNIT_COLUMNS = "id, unit_number, unit_type, monthly_rent, CASE WHEN is_occupied THEN 'Yes' ELSE 'No' END, created_at"
+
+# SQL text is built once so every call hits the connection's statement cache
+# Created date is stamped in the statement: databases upgraded from the original
+# schema keep a units table whose created_at has no DEFAULT
+_INSERT_UNIT = ("INSERT INTO units (unit_number, unit_type, monthly_rent, created_at) "
+                "VALUES (?, ?, ?, date('now', 'localtime'))")
+_INSERT_UNIT_RETURNING = f"{_INSERT_UNIT} RETURNING {UNIT_COLUMNS}"
+_SELECT_UNIT_BY_ID = f"SELECT {UNIT_COLUMNS} FROM units WHERE id = ?"
+_INSERT_UNIT_WITH_STATUS = ("INSERT INTO units (unit_number, unit_type, monthly_rent, is_occupied, created_at) "
+                            "VALUES (?, ?, ?, ?, ?)")
+_INSERT_TENANT = "INSERT INTO tenants (full_name, email, phone, unit_id, move_in_date) VALUES (?, ?, ?, ?, ?)"
+# Inserts nothing when the unit is gone, so callers can tell from rowcount
+_INSERT_TENANT_FOR_UNIT = ("INSERT INTO tenants (full_name, email, phone, unit_id, move_in_date) "
+                           "SELECT ?, ?, ?, id, ? FROM units WHERE id = ?")
+# Same, but also inserts nothing once someone else has taken the unit
+_INSERT_TENANT_FOR_VACANT_UNIT = _INSERT_TENANT_FOR_UNIT + " AND is_occupied = 0"
+_INSERT_PAYMENT = "INSERT INTO payments (tenant_id, amount, payment_date, month_covered) VALUES (?, ?, ?, ?)"
+_INSERT_PAYMENT_WITH_BILLS = ("INSERT INTO payments (tenant_id, amount, rent_amount, electric_bill, water_bill, "
+                              "payment_date, month_covered) VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+_connection = None
+
+
+def get_connection():
+    """Return the long-lived connection shared by all pages and dialogs"""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(DB_NAME, check_same_thread=False, cached_statements=256)
+        _connection.executescript(CONNECTION_PRAGMAS)
+    return _connection
+
+
+def close_connection():
+    """Close the shared connection (called once on application exit)"""
+    global _connection, _read_executor
+    if _connection is not None:
+        # Lets SQLite re-analyze tables whose statistics this session's queries found stale
+        _connection.execute("PRAGMA optimize")
+        _connection.close()
+        _connection = None
+    if _read_executor is not None:
+        # The reader connection belongs to the worker thread, so close it there
+        _read_executor.submit(_close_reader)
+        _read_executor.shutdown(wait=True)
+        _read_executor = None
+    _query_cache.clear()
+
+
+# Single worker thread for slow reads, with its own connection so the Tk
+# thread never waits on SQLite (WAL lets it read while the app writes)
+_read_executor = None
+_reader = None
+
+# Share of free pages in the file that makes run_maintenance() VACUUM
+VACUUM_FREE_RATIO = 0.25
+
+
+def _reader_connection():
+    global _reader
+    if _reader is None:
+        _reader = sqlite3.connect(DB_NAME, cached_statements=256)
+        _reader.executescript(CONNECTION_PRAGMAS)
+    return _reader
+
+
+def _close_reader():
+    global _reader
+    if _reader is not None:
+        _reader.execute("PRAGMA optimize")
+        _reader.close()
+        _reader = None
+
+
+def run_maintenance(conn):
+    """Refresh planner statistics; VACUUM once free pages pass VACUUM_FREE_RATIO of the file"""
+    conn.execute("PRAGMA optimize")
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    total = conn.execute("PRAGMA page_count").fetchone()[0]
+    if total and free / total > VACUUM_FREE_RATIO:
+        conn.execute("VACUUM")
+
+
+def submit_read(query):
+    """Run query(conn) on the background reader thread and return its Future"""
+    global _read_executor
+    if _read_executor is None:
+        _read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-reader")
+    return _read_executor.submit(lambda: query(_reader_connection()))
+
+
+# Dashboard counts also expire after this many seconds, which bounds how
+# stale they get when another process (e.g. database.py) writes the file
+KPI_TTL = 30.0
+
+# (sql, params) -> (tables the query reads, rows, expiry time or None)
+_query_cache = {}
+
+# table -> how many times it has been invalidated, so results read off the
+# Tk thread can tell whether a write landed since they were fetched
+_table_versions = {}
+
+
+def cached_query(sql, params=(), tables=(), ttl=None):
+    """Fetch rows through the shared connection, reusing the previous result
+    until one of the tables the query reads is invalidated or ttl seconds pass"""
+    key = (sql, params)
+    entry = _query_cache.get(key)
+    if entry is None or (entry[2] is not None and time.monotonic() >= entry[2]):
+        rows = get_connection().execute(sql, params).fetchall()
+        expires = None if ttl is None else time.monotonic() + ttl
+        entry = _query_cache[key] = (frozenset(tables), rows, expires)
+    return entry[1]
+
+
+def invalidate_cache(*tables):
+    """Forget cached results that read any of the given tables"""
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+    stale = [key for key, (deps, *_) in _query_cache.items() if not deps.isdisjoint(tables)]
+    for key in stale:
+        del _query_cache[key]
+
+
+def table_versions(tables):
+    """Current invalidation count of each table; compare two calls to detect writes in between"""
+    return tuple(_table_versions.get(table, 0) for table in tables)
+
+
+def count_available_units():
+    """Number of vacant units; an index-only count, far cheaper than listing them"""
+    return cached_query("SELECT COUNT(*) FROM units WHERE is_occupied = 0", tables=("units",), ttl=KPI_TTL)[0][0]
+
+
+def get_status_counts():
+    """(units, available, occupied, tenants, payments) from one cached query,
+    shared by the startup status print and the home page figures"""
+    return cached_query('''
+        SELECT (SELECT COUNT(*) FROM units), (SELECT COUNT(*) FROM units WHERE is_occupied = 0),
+               s.occupied_count, (SELECT COUNT(*) FROM tenants), s.payment_count
+        FROM apartment_stats s WHERE s.id = 1
+    ''', tables=("units", "tenants", "payments"), ttl=KPI_TTL)[0]
+
+
+def add_unit(unit_number, unit_type, monthly_rent):
+    """Insert a unit and return its UNIT_COLUMNS row.
+    Raises sqlite3.IntegrityError if the unit number is taken."""
+    conn = get_connection()
+    params = (unit_number, unit_type, monthly_rent)
+    with conn:
+        if HAS_RETURNING:
+            row = conn.execute(_INSERT_UNIT_RETURNING, params).fetchone()
+        else:
+            unit_id = conn.execute(_INSERT_UNIT, params).lastrowid
+            row = conn.execute(_SELECT_UNIT_BY_ID, (unit_id,)).fetchone()
+    invalidate_cache("units")
+    return row
+
+
+def register_tenant(full_name, email, phone, unit_id, move_in_date):
+    """Add a tenant to a vacant unit; the tenant insert trigger marks the unit occupied.
+    Raises ValueError if the unit is gone or already occupied."""
+    conn = get_connection()
+    with conn:
+        cur = conn.execute(_INSERT_TENANT_FOR_VACANT_UNIT, (full_name, email, phone, move_in_date, unit_id))
+    if cur.rowcount == 0:
+        raise ValueError(f"Unit {unit_id} is no longer available")
+    invalidate_cache("tenants", "units")
+    return cur.lastrowid
+
+
+def add_units_bulk(rows):
+    """Insert (unit_number, unit_type, monthly_rent) rows in one transaction.
+    Raises sqlite3.IntegrityError, adding none of them, if any unit number is taken."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(_INSERT_UNIT, rows)
+    invalidate_cache("units")
+
+
+def add_tenants_bulk(rows):
+    """Insert (full_name, email, phone, move_in_date, unit_id) rows in one transaction;
+    the tenant insert trigger marks the units occupied"""
+    conn = get_connection()
+    with conn:
+        conn.executemany(_INSERT_TENANT_FOR_UNIT, rows)
+    invalidate_cache("tenants", "units")
+
+
+def add_payments_bulk(rows):
+    """Insert (tenant_id, amount, payment_date, month_covered) rows in one transaction"""
+    conn = get_connection()
+    with conn:
+        conn.executemany(_INSERT_PAYMENT, rows)
+    invalidate_cache("payments")
+
+
+def get_totals_for_tenants(tenant_ids):
+    """Return {tenant_id: total paid} for many tenants in a single query"""
+    # One JSON array parameter avoids both N queries and the bound-parameter limit of IN (?, ...)
+    rows = get_connection().execute('''
+        SELECT tenant_id, SUM(amount) FROM payments
+        WHERE tenant_id IN (SELECT value FROM json_each(?))
+        GROUP BY tenant_id
+    ''', (json.dumps(list(tenant_ids)),))
+    return dict(rows)
+
+
+# Bump whenever SCHEMA_SQL changes; create_database() skips the script once
+# PRAGMA user_version has reached it
+SCHEMA_VERSION = 5
+
+# Column list and constraints of tenants, shared by SCHEMA_SQL and the rebuild below
+_TENANTS_TABLE = '''(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    unit_id INTEGER,
+    move_in_date TEXT NOT NULL,
+    FOREIGN KEY (unit_id) REFERENCES units(id) ON DELETE SET NULL,
+    CONSTRAINT chk_tenant_name CHECK (length(full_name) > 0),
+    -- date() returns NULL for anything that is not a YYYY-MM-DD date; IS keeps that NULL from passing
+    CONSTRAINT chk_move_in_date CHECK (date(move_in_date) IS move_in_date)
+)'''
+
+# Column list and constraints of payments, shared the same way
+_PAYMENTS_TABLE = '''(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    rent_amount REAL,
+    electric_bill REAL,
+    water_bill REAL,
+    payment_date TEXT NOT NULL,
+    month_covered TEXT,
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE,
+    CONSTRAINT chk_amount CHECK (amount > 0)
+)'''
+
+# Tables, stats row and triggers, run in one transaction by create_database()
+SCHEMA_SQL = f'''
+-- ==================== UNITS TABLE ====================
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    unit_number TEXT UNIQUE NOT NULL,
+    unit_type TEXT,
+    monthly_rent REAL,
+    is_occupied INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (date('now', 'localtime')),
+    CONSTRAINT chk_occupied CHECK (is_occupied IN (0, 1))
+);
+
+-- ==================== TENANTS TABLE ====================
+CREATE TABLE IF NOT EXISTS tenants {_TENANTS_TABLE};
+
+-- ==================== PAYMENTS TABLE (WITH BILL BREAKDOWN) ====================
+CREATE TABLE IF NOT EXISTS payments {_PAYMENTS_TABLE};
+
+-- ==================== STATS ROW ====================
+-- Single row of running totals kept current by the units and payments triggers below.
+-- It only holds derived figures, so a schema upgrade rebuilds it from the base tables.
+DROP TABLE IF EXISTS apartment_stats;
+CREATE TABLE apartment_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    occupied_count INTEGER NOT NULL DEFAULT 0,
+    payment_count INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0,
+    total_electric REAL NOT NULL DEFAULT 0,
+    total_water REAL NOT NULL DEFAULT 0
+);
+INSERT INTO apartment_stats (id, occupied_count, payment_count, total_amount, total_electric, total_water)
+SELECT 1, (SELECT COUNT(*) FROM units WHERE is_occupied = 1), COUNT(*),
+       COALESCE(SUM(amount), 0), COALESCE(SUM(electric_bill), 0), COALESCE(SUM(water_bill), 0)
+FROM payments;
+
+-- ==================== TRIGGERS ====================
+-- Dropped first so a schema upgrade replaces changed bodies instead of keeping the old ones
+DROP TRIGGER IF EXISTS update_unit_occupancy_on_tenant_insert;
+CREATE TRIGGER update_unit_occupancy_on_tenant_insert
+AFTER INSERT ON tenants
+WHEN NEW.unit_id IS NOT NULL
+BEGIN
+    UPDATE units SET is_occupied = 1 WHERE id = NEW.unit_id;
+END;
+
+DROP TRIGGER IF EXISTS update_unit_occupancy_on_tenant_delete;
+CREATE TRIGGER update_unit_occupancy_on_tenant_delete
+AFTER DELETE ON tenants
+WHEN OLD.unit_id IS NOT NULL
+BEGIN
+    UPDATE units SET is_occupied = 0 WHERE id = OLD.unit_id;
+END;
+
+DROP TRIGGER IF EXISTS update_unit_occupancy_on_tenant_update;
+CREATE TRIGGER update_unit_occupancy_on_tenant_update
+AFTER UPDATE OF unit_id ON tenants
+BEGIN
+    UPDATE units SET is_occupied = 0 WHERE id = OLD.unit_id AND OLD.unit_id IS NOT NULL;
+    UPDATE units SET is_occupied = 1 WHERE id = NEW.unit_id AND NEW.unit_id IS NOT NULL;
+END;
+
+DROP TRIGGER IF EXISTS count_occupied_on_unit_insert;
+CREATE TRIGGER count_occupied_on_unit_insert
+AFTER INSERT ON units
+WHEN NEW.is_occupied = 1
+BEGIN
+    UPDATE apartment_stats SET occupied_count = occupied_count + 1 WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS count_occupied_on_unit_delete;
+CREATE TRIGGER count_occupied_on_unit_delete
+AFTER DELETE ON units
+WHEN OLD.is_occupied = 1
+BEGIN
+    UPDATE apartment_stats SET occupied_count = occupied_count - 1 WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS count_occupied_on_unit_update;
+CREATE TRIGGER count_occupied_on_unit_update
+AFTER UPDATE OF is_occupied ON units
+WHEN NEW.is_occupied IS NOT OLD.is_occupied
+BEGIN
+    UPDATE apartment_stats SET occupied_count = occupied_count + NEW.is_occupied - OLD.is_occupied WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS total_payments_on_insert;
+CREATE TRIGGER total_payments_on_insert
+AFTER INSERT ON payments
+BEGIN
+    UPDATE apartment_stats SET
+        payment_count = payment_count + 1,
+        total_amount = total_amount + NEW.amount,
+        total_electric = total_electric + COALESCE(NEW.electric_bill, 0),
+        total_water = total_water + COALESCE(NEW.water_bill, 0)
+    WHERE id = 1;
+END;
+
+-- Also fires for the payments removed by ON DELETE CASCADE from tenants
+DROP TRIGGER IF EXISTS total_payments_on_delete;
+CREATE TRIGGER total_payments_on_delete
+AFTER DELETE ON payments
+BEGIN
+    UPDATE apartment_stats SET
+        payment_count = payment_count - 1,
+        total_amount = total_amount - OLD.amount,
+        total_electric = total_electric - COALESCE(OLD.electric_bill, 0),
+        total_water = total_water - COALESCE(OLD.water_bill, 0)
+    WHERE id = 1;
+END;
+
+DROP TRIGGER IF EXISTS total_payments_on_update;
+CREATE TRIGGER total_payments_on_update
+AFTER UPDATE OF amount, electric_bill, water_bill ON payments
+BEGIN
+    UPDATE apartment_stats SET
+        total_amount = total_amount + NEW.amount - OLD.amount,
+        total_electric = total_electric + COALESCE(NEW.electric_bill, 0) - COALESCE(OLD.electric_bill, 0),
+        total_water = total_water + COALESCE(NEW.water_bill, 0) - COALESCE(OLD.water_bill, 0)
+    WHERE id = 1;
+END;
+'''
+
+# Copies an existing tenants table into the current definition, which drops the old
+# monthly_rent column and adds new constraints without ALTER TABLE ... DROP COLUMN
+# (SQLite 3.35+). Rows the old table let through get placeholders so the copy cannot
+# fail. Runs with foreign keys off, so dropping the old table neither cascades to
+# payments nor unassigns units; the triggers and indexes on tenants are recreated
+# by SCHEMA_SQL and create_indexes().
+_REBUILD_TENANTS_SQL = f'''
+DROP TABLE IF EXISTS tenants_new;
+CREATE TABLE tenants_new {_TENANTS_TABLE};
+INSERT INTO tenants_new (id, full_name, email, phone, unit_id, move_in_date)
+SELECT id, COALESCE(NULLIF(full_name, ''), 'Unnamed tenant'), email, phone, unit_id,
+       COALESCE(date(move_in_date), date('now', 'localtime'))
+FROM tenants;
+DROP TABLE tenants;
+ALTER TABLE tenants_new RENAME TO tenants;
+'''
+
+# Same for payments, so upgraded databases get chk_amount. Amounts are recorded money,
+# so the old rows are copied unchanged with CHECK constraints briefly ignored; only
+# new and updated payments are held to them.
+_REBUILD_PAYMENTS_SQL = f'''
+DROP TABLE IF EXISTS payments_new;
+CREATE TABLE payments_new {_PAYMENTS_TABLE};
+PRAGMA ignore_check_constraints = ON;
+INSERT INTO payments_new (id, tenant_id, amount, rent_amount, electric_bill, water_bill, payment_date, month_covered)
+SELECT id, tenant_id, amount, rent_amount, electric_bill, water_bill, payment_date, month_covered
+FROM payments;
+PRAGMA ignore_check_constraints = OFF;
+DROP TABLE payments;
+ALTER TABLE payments_new RENAME TO payments;
+'''
+
+# Existing tables that every schema upgrade rebuilds to their current definition
+_TABLE_REBUILDS = (("tenants", _REBUILD_TENANTS_SQL), ("payments", _REBUILD_PAYMENTS_SQL))
+
+# Secondary indexes, built by create_indexes() once the sample rows are in
+INDEX_SQL = '''
+BEGIN;
+-- ==================== UNITS ====================
+-- UNIQUE already indexes unit_number (sqlite_autoindex_units_1)
+DROP INDEX IF EXISTS idx_units_number;
+-- Only vacant units are indexed, already in the order the Add Tenant picker lists them
+DROP INDEX IF EXISTS idx_units_occupied;
+DROP INDEX IF EXISTS idx_units_available;
+CREATE INDEX IF NOT EXISTS idx_units_vacant ON units(unit_number) WHERE is_occupied = 0;
+-- Occupied count and expected monthly rent are read from this index alone
+CREATE INDEX IF NOT EXISTS idx_units_occupied_rent ON units(is_occupied, monthly_rent);
+
+-- ==================== TENANTS ====================
+CREATE INDEX IF NOT EXISTS idx_tenants_name ON tenants(full_name);
+CREATE INDEX IF NOT EXISTS idx_tenants_unit ON tenants(unit_id);
+
+-- ==================== PAYMENTS ====================
+-- Foreign-key index that also covers per-tenant and per-tenant-month totals of amount and bills
+DROP INDEX IF EXISTS idx_payments_tenant;
+DROP INDEX IF EXISTS idx_payments_tenant_amount;
+CREATE INDEX IF NOT EXISTS idx_payments_tenant_cover
+    ON payments(tenant_id, month_covered, amount, electric_bill, water_bill);
+-- Covering indexes: the payment listings (newest first, paged by payment_date, id) and the
+-- monthly revenue totals are answered from index pages without touching the table
+DROP INDEX IF EXISTS idx_payments_date;
+DROP INDEX IF EXISTS idx_payments_month;
+CREATE INDEX IF NOT EXISTS idx_payments_date_cover
+    ON payments(payment_date, id, tenant_id, amount, month_covered);
+CREATE INDEX IF NOT EXISTS idx_payments_month_amount ON payments(month_covered, amount);
+COMMIT;
+'''
+
+
+# Lookups that must stay index-backed; predicates compare the stored ISO
+# strings directly (no date()/strftime() around the column) so they stay sargable
+_PLAN_CHECKS = (
+    ("Vacant units", "SELECT COUNT(*) FROM units WHERE is_occupied = 0"),
+    ("Occupied rent", "SELECT SUM(monthly_rent) FROM units WHERE is_occupied = 1"),
+    ("Payments by tenant", "SELECT SUM(amount) FROM payments WHERE tenant_id = ?"),
+    ("Bills for a tenant's month",
+     "SELECT amount, electric_bill, water_bill FROM payments WHERE tenant_id = ? AND month_covered = ?"),
+    ("Payments for a month", "SELECT SUM(amount) FROM payments WHERE month_covered = ?"),
+    ("Payments in a date range", "SELECT SUM(amount) FROM payments WHERE payment_date >= ? AND payment_date < ?"),
+)
+
+
+# Partial indexes hold only the rows their WHERE matches, so scanning one is not a table scan
+_PARTIAL_INDEXES = ("idx_units_vacant",)
+
+
+def check_query_plans(cur):
+    """Warn about key lookups that SQLite would answer by scanning instead of an index SEARCH"""
+    for label, sql in _PLAN_CHECKS:
+        # Plan rows are read straight off the cursor; nothing needs them twice
+        scans = [detail for *_, detail in cur.execute("EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))
+                 if detail.startswith("SCAN") and not any(index in detail for index in _PARTIAL_INDEXES)]
+        if scans:
+            print(f"   ⚠️  {label} is not using an index: {'; '.join(scans)}")
+
+
+# Main reports and the index each is expected to use (printed by display_summary with VV_EXPLAIN=1)
+_REPORT_PLANS = (
+    ("Recent payments",
+     "SELECT t.full_name, p.amount, p.payment_date FROM payments p JOIN tenants t ON p.tenant_id = t.id "
+     "ORDER BY p.payment_date DESC LIMIT 5",
+     "idx_payments_date_cover"),
+    ("Monthly revenue",
+     "SELECT month_covered, SUM(amount) FROM payments WHERE month_covered IS NOT NULL GROUP BY month_covered",
+     "idx_payments_month_amount"),
+)
+
+
+def explain_reports(cur):
+    """Print the query plan of each main report, warning when its index is not used
+    or the rows need a separate sort step"""
+    print("\n🔍 Query plans:")
+    for label, sql, index in _REPORT_PLANS:
+        cur.execute("EXPLAIN QUERY PLAN " + sql)
+        details = [detail for *_, detail in cur.fetchall()]
+        print(f"   {label}:")
+        for detail in details:
+            print(f"      {detail}")
+        if not any(index in detail for detail in details):
+            print(f"   ⚠️  {label} is not using {index}; re-run create_indexes() to add it")
+        # The index order should satisfy ORDER BY, so LIMIT stops after a few index entries
+        if any("TEMP B-TREE" in detail for detail in details):
+            print(f"   ⚠️  {label} sorts its rows instead of reading them in index order")
+
+
 def create_database():
     """Create the database and all tables"""
     print("🏢 Vista Verde Apartments - Database Setup")
@@ -15,100 +523,34 @@ def create_database():
     
     try:
         conn = sqlite3.connect(DB_NAME)
+        # Same WAL/synchronous settings as the app, so setup doesn't fsync per statement
+        conn.executescript(CONNECTION_PRAGMAS)
         cur = conn.cursor()
         
-        print("\n📊 Creating tables...")
-        
-        # ==================== UNITS TABLE ====================
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS units (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                unit_number TEXT UNIQUE NOT NULL,
-                unit_type TEXT,
-                monthly_rent REAL,
-                is_occupied INTEGER DEFAULT 0,
-                created_at TEXT,
-                CONSTRAINT chk_occupied CHECK (is_occupied IN (0, 1))
-            )
-        ''')
-        print("   ✓ Units table created")
-        
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_units_number ON units(unit_number)')
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_units_occupied ON units(is_occupied)')
-        
-        # ==================== TENANTS TABLE ====================
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS tenants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                unit_id INTEGER,
-                move_in_date TEXT,
-                monthly_rent REAL,
-                FOREIGN KEY (unit_id) REFERENCES units(id) ON DELETE SET NULL
-            )
-        ''')
-        print("   ✓ Tenants table created")
-        
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_tenants_name ON tenants(full_name)')
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_tenants_unit ON tenants(unit_id)')
-        
-        # ==================== PAYMENTS TABLE (WITH BILL BREAKDOWN) ====================
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tenant_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                rent_amount REAL,
-                electric_bill REAL,
-                water_bill REAL,
-                payment_date TEXT NOT NULL,
-                month_covered TEXT,
-                FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE
-            )
-        ''')
-        print("   ✓ Payments table created (with bill breakdown)")
-        
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_payments_tenant ON payments(tenant_id)')
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_payments_date ON payments(payment_date)')
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_payments_month ON payments(month_covered)')
-        
-        # ==================== TRIGGERS ====================
-        print("\n🔄 Creating triggers...")
-        
-        cur.execute('''
-            CREATE TRIGGER IF NOT EXISTS update_unit_occupancy_on_tenant_insert
-            AFTER INSERT ON tenants
-            WHEN NEW.unit_id IS NOT NULL
-            BEGIN
-                UPDATE units SET is_occupied = 1 WHERE id = NEW.unit_id;
-            END
-        ''')
-        print("   ✓ Tenant insert trigger created")
-        
-        cur.execute('''
-            CREATE TRIGGER IF NOT EXISTS update_unit_occupancy_on_tenant_delete
-            AFTER DELETE ON tenants
-            WHEN OLD.unit_id IS NOT NULL
-            BEGIN
-                UPDATE units SET is_occupied = 0 WHERE id = OLD.unit_id;
-            END
-        ''')
-        print("   ✓ Tenant delete trigger created")
-        
-        cur.execute('''
-            CREATE TRIGGER IF NOT EXISTS update_unit_occupancy_on_tenant_update
-            AFTER UPDATE OF unit_id ON tenants
-            BEGIN
-                UPDATE units SET is_occupied = 0 WHERE id = OLD.unit_id AND OLD.unit_id IS NOT NULL;
-                UPDATE units SET is_occupied = 1 WHERE id = NEW.unit_id AND NEW.unit_id IS NOT NULL;
-            END
-        ''')
-        print("   ✓ Tenant update trigger created")
-        
-        conn.commit()
-        print("\n✅ Database structure created successfully!")
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            print(f"\n📊 Schema is up to date (version {version})")
+        else:
+            print("\n📊 Creating tables and triggers...")
+            # Existing tenants and payments tables are rebuilt to the current definition on every upgrade
+            tables = {name for name, in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            rebuild = "".join(sql for table, sql in _TABLE_REBUILDS if table in tables)
+            # One transaction: a failure part-way leaves the old schema and version untouched.
+            # foreign_keys can only change outside a transaction, hence around BEGIN/COMMIT.
+            try:
+                cur.executescript(f"PRAGMA foreign_keys = OFF;\nBEGIN;\n{rebuild}{SCHEMA_SQL}"
+                                  f"PRAGMA user_version = {SCHEMA_VERSION};\nCOMMIT;\nPRAGMA foreign_keys = ON;")
+            except sqlite3.Error:
+                conn.rollback()
+                conn.execute("PRAGMA foreign_keys = ON")
+                conn.execute("PRAGMA ignore_check_constraints = OFF")
+                raise
+            print("   ✓ Units table created")
+            print("   ✓ Tenants table created")
+            print("   ✓ Payments table created (with bill breakdown)")
+            print("   ✓ Occupancy and payment-total triggers and stats row created")
+            print("\n✅ Database structure created successfully!")
         
         return conn, cur
         
@@ -117,6 +559,27 @@ def create_database():
         return None, None
 
 
+def create_indexes(conn, cur):
+    """Build any missing secondary indexes, gathering planner statistics the first time.
+    Called after insert_sample_data so each index is built once over the loaded rows"""
+    print("\n🗂️  Creating indexes...")
+    
+    try:
+        cur.executescript(INDEX_SQL)
+        # Later runs leave the statistics to PRAGMA optimize (maintenance timer and shutdown)
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cur.fetchone() is None:
+            cur.execute("ANALYZE")
+        conn.commit()
+        print("   ✓ Indexes created and statistics gathered")
+        
+        check_query_plans(cur)
+        
+    except sqlite3.Error as e:
+        print(f"\n❌ Error creating indexes: {e}")
+        conn.rollback()
+
+
 def insert_sample_data(conn, cur):
     """Insert sample data with bill breakdown"""
     print("\n📝 Inserting sample data...")
@@ -127,6 +590,9 @@ def insert_sample_data(conn, cur):
             print("   ⚠️  Sample data already exists. Skipping...")
             return
         
+        # All sample rows go in under one write lock and a single commit
+        cur.execute("BEGIN IMMEDIATE")
+        
         # Insert units
         units_data = [
             ('101', 'Studio', 8000.00, 1, '2024-01-15'),
@@ -140,61 +606,47 @@ def insert_sample_data(conn, cur):
             ('303', '2 Bedroom', 20000.00, 0, '2024-03-10'),
         ]
         
-        cur.executemany(
-            'INSERT INTO units (unit_number, unit_type, monthly_rent, is_occupied, created_at) VALUES (?, ?, ?, ?, ?)',
-            units_data
-        )
+        cur.executemany(_INSERT_UNIT_WITH_STATUS, units_data)
         print(f"   ✓ Added {len(units_data)} units")
         
         # Insert tenants
         tenants_data = [
-            ('Maria Santos', 'maria.santos@email.com', '09171234567', 1, '2024-01-15', 8000.00),
-            ('Juan Dela Cruz', 'juan.delacruz@email.com', '09281234567', 2, '2024-01-20', 12000.00),
-            ('Carlos Mendoza', 'carlos.m@email.com', '09451234567', 3, '2024-02-10', 18000.00),
-            ('Ana Reyes', 'ana.reyes@email.com', '09391234567', 4, '2024-02-01', 8500.00),
-            ('Sofia Garcia', 'sofia.garcia@email.com', '09561234567', 5, '2024-03-01', 12500.00),
-            ('Yohan Anzobal', 'yohan.a@email.com', '09661234567', 8, '2024-03-15', 13000.00),
+            ('Maria Santos', 'maria.santos@email.com', '09171234567', 1, '2024-01-15'),
+            ('Juan Dela Cruz', 'juan.delacruz@email.com', '09281234567', 2, '2024-01-20'),
+            ('Carlos Mendoza', 'carlos.m@email.com', '09451234567', 3, '2024-02-10'),
+            ('Ana Reyes', 'ana.reyes@email.com', '09391234567', 4, '2024-02-01'),
+            ('Sofia Garcia', 'sofia.garcia@email.com', '09561234567', 5, '2024-03-01'),
+            ('Yohan Anzobal', 'yohan.a@email.com', '09661234567', 8, '2024-03-15'),
         ]
         
-        cur.executemany(
-            'INSERT INTO tenants (full_name, email, phone, unit_id, move_in_date, monthly_rent) VALUES (?, ?, ?, ?, ?, ?)',
-            tenants_data
-        )
+        cur.executemany(_INSERT_TENANT, tenants_data)
         print(f"   ✓ Added {len(tenants_data)} tenants")
         
         # Insert payments WITH BILL BREAKDOWN
-        # Format: (tenant_id, total_amount, rent, electric, water, date, month)
-        payments_data = [
-            # Maria Santos - Unit 101
-            (1, 8800.00, 8000.00, 500.00, 300.00, '2024-02-01', '2024-02'),
-            (1, 8800.00, 8000.00, 500.00, 300.00, '2024-03-01', '2024-03'),
-            (1, 8800.00, 8000.00, 500.00, 300.00, '2024-04-01', '2024-04'),
-            (1, 8800.00, 8000.00, 500.00, 300.00, '2024-11-01', '2024-11'),
-            
-            # Juan Dela Cruz - Unit 102
-            (2, 12800.00, 12000.00, 500.00, 300.00, '2024-03-01', '2024-03'),
-            (2, 12800.00, 12000.00, 500.00, 300.00, '2024-04-01', '2024-04'),
-            (2, 12800.00, 12000.00, 500.00, 300.00, '2024-11-01', '2024-11'),
-            
-            # Carlos Mendoza - Unit 103 (2 Bedroom - higher bills)
-            (3, 9300.00, 8500.00, 500.00, 300.00, '2024-03-15', '2024-03'),
-            (3, 9300.00, 8500.00, 500.00, 300.00, '2024-04-15', '2024-04'),
-            (3, 9300.00, 8500.00, 500.00, 300.00, '2024-11-15', '2024-11'),
-            
-            # Ana Reyes - Unit 201
-            (4, 9300.00, 8500.00, 500.00, 300.00, '2024-03-15', '2024-03'),
-            (4, 9300.00, 8500.00, 500.00, 300.00, '2024-04-15', '2024-04'),
-            
-            # Yohan Anzobal - Unit 302
-            (6, 13800.00, 13000.00, 500.00, 300.00, '2024-11-27', '2024-11'),
-            (6, 13800.00, 13000.00, 500.00, 300.00, '2024-12-07', '2025-12'),
+        # Schedule: (tenant_id, total_amount, rent, day of month, months paid in 2024)
+        payment_schedule = [
+            (1, 8800.00, 8000.00, 1, (2, 3, 4, 11)),     # Maria Santos - Unit 101
+            (2, 12800.00, 12000.00, 1, (3, 4, 11)),      # Juan Dela Cruz - Unit 102
+            (3, 9300.00, 8500.00, 15, (3, 4, 11)),       # Carlos Mendoza - Unit 103
+            (4, 9300.00, 8500.00, 15, (3, 4)),           # Ana Reyes - Unit 201
         ]
-        
-        cur.executemany(
-            'INSERT INTO payments (tenant_id, amount, rent_amount, electric_bill, water_bill, payment_date, month_covered) VALUES (?, ?, ?, ?, ?, ?, ?)',
-            payments_data
+        # Rows are generated as executemany consumes them
+        # Format: (tenant_id, total_amount, rent, electric, water, date, month)
+        payments_data = itertools.chain(
+            (
+                (tenant_id, total, rent, 500.00, 300.00, f"2024-{m:02d}-{day:02d}", f"2024-{m:02d}")
+                for tenant_id, total, rent, day, months in payment_schedule
+                for m in months
+            ),
+            # Yohan Anzobal - Unit 302 (off-schedule payments)
+            [
+                (6, 13800.00, 13000.00, 500.00, 300.00, '2024-11-27', '2024-11'),
+                (6, 13800.00, 13000.00, 500.00, 300.00, '2024-12-07', '2025-12'),
+            ],
         )
-        print(f"   ✓ Added {len(payments_data)} payment records with bill breakdown")
+        
+        cur.executemany(_INSERT_PAYMENT_WITH_BILLS, payments_data)
+        print(f"   ✓ Added {cur.rowcount} payment records with bill breakdown")
         
         conn.commit()
         print("\n✅ Sample data inserted successfully!")
@@ -211,37 +663,38 @@ def display_summary(cur):
     print("=" * 50)
     
     try:
-        # Count units
-        cur.execute("SELECT COUNT(*), SUM(is_occupied) FROM units")
-        total_units, occupied = cur.fetchone()
+        # Every figure below comes from one statement; the payment totals are the
+        # trigger-maintained running sums rather than a pass over payments
+        cur.execute('''
+            SELECT (SELECT COUNT(*) FROM units), s.occupied_count, (SELECT COUNT(*) FROM tenants),
+                   s.payment_count, s.total_amount, s.total_electric, s.total_water
+            FROM apartment_stats s WHERE s.id = 1
+        ''')
+        (total_units, occupied, total_tenants,
+         total_payments, total_revenue, total_electric, total_water) = cur.fetchone()
+        
+        # Units
         available = total_units - (occupied or 0)
         print(f"\n🏢 Units:")
         print(f"   Total: {total_units}")
         print(f"   Occupied: {occupied or 0}")
         print(f"   Available: {available}")
         
-        # Count tenants
-        cur.execute("SELECT COUNT(*) FROM tenants")
-        total_tenants = cur.fetchone()[0]
+        # Tenants
         print(f"\n👥 Tenants: {total_tenants}")
         
-        # Count payments and total revenue
-        cur.execute("SELECT COUNT(*), SUM(amount) FROM payments")
-        total_payments, total_revenue = cur.fetchone()
+        # Payments and total revenue
         print(f"\n💰 Payments:")
         print(f"   Total Transactions: {total_payments}")
         print(f"   Total Revenue: ₱{total_revenue:,.2f}" if total_revenue else "   Total Revenue: ₱0.00")
         
-        # Calculate utility bills from payments
-        cur.execute("SELECT SUM(electric_bill) FROM payments")
-        total_electric = cur.fetchone()[0] or 0
-        
-        cur.execute("SELECT SUM(water_bill) FROM payments")
-        total_water = cur.fetchone()[0] or 0
-        
+        # Utility bills from payments
         print(f"\n⚡ Utility Bills (from payments):")
-        print(f"   Total Electric: ₱{total_electric:,.2f}")
-        print(f"   Total Water: ₱{total_water:,.2f}")
+        print(f"   Total Electric: ₱{total_electric or 0:,.2f}")
+        print(f"   Total Water: ₱{total_water or 0:,.2f}")
+        
+        if os.environ.get("VV_EXPLAIN"):
+            explain_reports(cur)
         
         print("\n" + "=" * 50)
         print("✅ Database is ready to use!")
@@ -261,7 +714,9 @@ def main():
     
     if conn and cur:
         insert_sample_data(conn, cur)
+        create_indexes(conn, cur)
         display_summary(cur)
+        cur.execute("PRAGMA optimize")
         conn.close()
         print("\n✅ Database connection closed.")
         print("\n✨ Setup complete! Your database is ready.\n")
@@ -5,8 +5,17 @@ Vista Verde Apartments - Add Tenant Dialog
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
+from database import cached_query, count_available_units, register_tenant
 
-DB_NAME = "vista_verde.db"
+# Only the columns the combobox needs, in the order they are listed
+_AVAILABLE_UNITS = ("SELECT id, unit_number, unit_type, monthly_rent FROM units "
+                    "WHERE is_occupied = 0 ORDER BY unit_number")
+
+# Messages for the tenants CHECK constraints, keyed by constraint name
+_CHECK_MESSAGES = {
+    "chk_tenant_name": "Full Name is required",
+    "chk_move_in_date": "Move-In Date must be a valid date in YYYY-MM-DD format",
+}
 
 class AddTenantDialog(tk.Toplevel):
     def __init__(self, parent, callback):
@@ -44,23 +53,19 @@ class AddTenantDialog(tk.Toplevel):
         )
         self.unit_type_label.pack(pady=(5, 0), padx=60)
         
-        # Load available units with their types
-        conn = sqlite3.connect(DB_NAME)
-        units = conn.execute(
-            "SELECT id, unit_number, unit_type, monthly_rent FROM units WHERE is_occupied = 0"
-        ).fetchall()
-        combo['values'] = [f"{u[1]} (Available)" for u in units]
-        
-        # Store unit data including type and rent
-        self.unit_data = {
-            f"{u[1]} (Available)": {
-                'id': u[0],
-                'type': u[2],
-                'rent': u[3]
-            } 
-            for u in units
-        }
-        conn.close()
+        # Build the combobox labels and the (id, type, rent) of each unit in one pass
+        values = []
+        self.unit_data = {}
+        if count_available_units():
+            for unit_id, unit_number, unit_type, rent in cached_query(_AVAILABLE_UNITS, tables=("units",)):
+                label = f"{unit_number} (Available)"
+                values.append(label)
+                self.unit_data[label] = (unit_id, unit_type, rent)
+        else:
+            # Every unit is taken; skip the scan and say so up front
+            combo.config(state="disabled")
+            self.unit_type_label.config(text="No available units", fg="#c0392b")
+        combo['values'] = values
         
         # Bind selection event to show unit type
         combo.bind("<<ComboboxSelected>>", self.on_unit_selected)
@@ -75,9 +80,8 @@ class AddTenantDialog(tk.Toplevel):
         """Display unit type and rent when a unit is selected"""
         unit_text = self.unit_var.get()
         if unit_text and unit_text in self.unit_data:
-            unit_info = self.unit_data[unit_text]
-            unit_type = unit_info['type'] or "Standard"
-            rent = unit_info['rent']
+            _, unit_type, rent = self.unit_data[unit_text]
+            unit_type = unit_type or "Standard"
             
             # Display unit type and rent
             self.unit_type_label.config(
@@ -93,9 +97,6 @@ class AddTenantDialog(tk.Toplevel):
         date_in = self.entries["Move-In Date (YYYY-MM-DD)"].get().strip()
         unit_text = self.unit_var.get()
         
-        if not name or not date_in:
-            return messagebox.showerror("Error", "Name and Move-In Date required")
-
         if not unit_text:
             return messagebox.showerror("Error", "Please select a unit")
         
@@ -103,27 +104,18 @@ class AddTenantDialog(tk.Toplevel):
         if not unit_info:
             return messagebox.showerror("Error", "Invalid unit selection")
         
-        unit_id = unit_info['id']
-        rent = unit_info['rent']
-        
-        conn = sqlite3.connect(DB_NAME)
+        unit_id = unit_info[0]
         
         try:
-            conn.execute(
-                "INSERT INTO tenants (full_name, email, phone, unit_id, move_in_date, monthly_rent) VALUES (?, ?, ?, ?, ?, ?)",
-                (name, email or None, phone or None, unit_id, date_in, rent)
-            )
-            
-            # Mark unit as occupied
-            conn.execute("UPDATE units SET is_occupied = 1 WHERE id=?", (unit_id,))
-            
-            conn.commit()
+            # Rent comes from the unit and occupancy from the tenant trigger, in one statement
+            tenant_id = register_tenant(name, email or None, phone or None, unit_id, date_in)
             messagebox.showinfo("Success", f"Tenant {name} added successfully!")
-            self.callback()
+            self.callback(tenant_id)
             self.destroy()
             
+        except sqlite3.IntegrityError as e:
+            # Name and move-in date are validated by the table's CHECK constraints
+            constraint = str(e).rpartition(": ")[2]
+            messagebox.showerror("Error", _CHECK_MESSAGES.get(constraint, f"Failed to add tenant: {e}"))
         except Exception as e:
-            conn.rollback()
             messagebox.showerror("Error", f"Failed to add tenant: {str(e)}")
-        finally:
-            conn.close()
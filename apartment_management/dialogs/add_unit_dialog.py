@@ -4,10 +4,8 @@ Vista Verde Apartments - Add Unit Dialog
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 import sqlite3
-
-DB_NAME = "vista_verde.db"
+from database import add_unit
 
 class AddUnitDialog(tk.Toplevel):
     def __init__(self, parent, callback):
@@ -49,17 +47,12 @@ class AddUnitDialog(tk.Toplevel):
         if not num or not typ:
             return messagebox.showerror("Error", "All fields required")
         
-        conn = sqlite3.connect(DB_NAME)
         try:
-            conn.execute(
-                "INSERT INTO units (unit_number, unit_type, monthly_rent, created_at) VALUES (?, ?, ?, ?)",
-                (num, typ, rent, datetime.now().strftime("%Y-%m-%d"))
-            )
-            conn.commit()
+            # created_at is filled in by the column default; a duplicate
+            # number rolls the transaction back instead of leaving it open
+            row = add_unit(num, typ, rent)
             messagebox.showinfo("Success", f"Unit {num} added!")
-            self.callback()
+            self.callback(row)
             self.destroy()
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Unit number already exists")
-        finally:
-            conn.close()
@@ -4,10 +4,18 @@ Vista Verde Apartments - Record Payment Dialog
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 import sqlite3
+from datetime import datetime
+from database import get_connection, cached_query, invalidate_cache
 
-DB_NAME = "vista_verde.db"
+# Paid-on date is stamped by SQLite, the same way units.created_at is
+_INSERT_PAYMENT_TODAY = ("INSERT INTO payments (tenant_id, amount, payment_date, month_covered) "
+                         "VALUES (?, ?, date('now', 'localtime'), ?)")
+
+# Messages for the payments CHECK constraints, keyed by constraint name
+_CHECK_MESSAGES = {
+    "chk_amount": "Amount must be greater than zero",
+}
 
 class RecordPaymentDialog(tk.Toplevel):
     def __init__(self, parent, callback):
@@ -27,11 +35,13 @@ class RecordPaymentDialog(tk.Toplevel):
         combo.pack(pady=5, padx=60)
         
         # Load tenants
-        conn = sqlite3.connect(DB_NAME)
-        tenants = conn.execute("SELECT id, full_name FROM tenants").fetchall()
-        combo['values'] = [t[1] for t in tenants]
-        self.tenant_ids = {t[1]: t[0] for t in tenants}
-        conn.close()
+        tenants = cached_query("SELECT id, full_name FROM tenants", tables=("tenants",))
+        names = []
+        self.tenant_ids = {}
+        for tenant_id, full_name in tenants:
+            names.append(full_name)
+            self.tenant_ids[full_name] = tenant_id
+        combo['values'] = names
 
         # Amount field
         tk.Label(self, text="Amount Paid (₱):").pack(anchor="w", padx=60, pady=(15,5))
@@ -65,14 +75,15 @@ class RecordPaymentDialog(tk.Toplevel):
 
         tenant_id = self.tenant_ids[tenant_name]
         
-        conn = sqlite3.connect(DB_NAME)
-        conn.execute(
-            "INSERT INTO payments (tenant_id, amount, payment_date, month_covered) VALUES (?, ?, ?, ?)",
-            (tenant_id, amount, datetime.now().strftime("%Y-%m-%d"), month)
-        )
-        conn.commit()
-        conn.close()
+        try:
+            with get_connection() as conn:
+                cur = conn.execute(_INSERT_PAYMENT_TODAY, (tenant_id, amount, month))
+        except sqlite3.IntegrityError as e:
+            # Anything but a named CHECK (e.g. a tenant deleted meanwhile) shows the raw error
+            constraint = str(e).rpartition(": ")[2]
+            return messagebox.showerror("Error", _CHECK_MESSAGES.get(constraint, f"Failed to record payment: {e}"))
+        invalidate_cache("payments")
         
         messagebox.showinfo("Success", f"Payment of ₱{amount:,.2f} recorded!")
-        self.callback()
+        self.callback(cur.lastrowid)
         self.destroy()
@@ -3,7 +3,7 @@
 Vista Verde Apartments - Login Page
 """
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import ttk, messagebox
 
 class LoginPage(tk.Tk):
     def __init__(self, on_success):
@@ -19,8 +19,25 @@ class LoginPage(tk.Tk):
         self.bind('<Escape>', lambda e: self.attributes('-fullscreen', False))
         
         # Create login UI
+        self.create_styles()
         self.create_login_ui()
     
+    def create_styles(self):
+        style = ttk.Style(self)
+        # Native themes (aqua, vista) ignore button colours, so only this style borrows
+        # clam's border element, which paints the background; the theme itself is untouched
+        if "Login.Button.border" not in style.element_names():
+            style.element_create("Login.Button.border", "from", "clam", "Button.border")
+        style.layout("Login.TButton", [
+            ("Login.Button.border", {"sticky": "nswe", "children": [
+                ("Button.focus", {"sticky": "nswe", "children": [
+                    ("Button.padding", {"sticky": "nswe", "children": [
+                        ("Button.label", {"sticky": "nswe"})]})]})]})])
+        style.configure("Login.TButton", font=("Helvetica", 12, "bold"),
+                        background="#00a8b5", foreground="white", borderwidth=0, padding=(0, 12))
+        # Tk swaps the colour itself on hover, no Python callbacks involved
+        style.map("Login.TButton", background=[("pressed", "#007a83"), ("active", "#008c96")])
+    
     def create_login_ui(self):
         # Main container
         main_frame = tk.Frame(self, bg="#00a8b5")
@@ -71,16 +88,11 @@ class LoginPage(tk.Tk):
         self.username_entry.bind("<Return>", lambda e: self.password_entry.focus())
         self.password_entry.bind("<Return>", lambda e: self.login())
         
-        # Login button
-        login_btn = tk.Button(form_frame, text="LOGIN", font=("Helvetica", 12, "bold"),
-                            bg="#00a8b5", fg="white", width=25, height=2,
-                            relief="flat", cursor="hand2", command=self.login)
+        # Login button (hover colour comes from the Login.TButton style map)
+        login_btn = ttk.Button(form_frame, text="LOGIN", style="Login.TButton", width=25,
+                               cursor="hand2", command=self.login)
         login_btn.pack(pady=(10, 15))
         
-        # Hover effects
-        login_btn.bind("<Enter>", lambda e: login_btn.config(bg="#008c96"))
-        login_btn.bind("<Leave>", lambda e: login_btn.config(bg="#00a8b5"))
-        
         # Footer text
         tk.Label(main_frame, text="Rental Management System",
                 font=("Helvetica", 10), fg="#b0f8ff", bg="#00a8b5").pack(pady=(20, 0))
@@ -6,7 +6,6 @@ Owner: Ford Asuncion
 import tkinter as tk
 from tkinter import ttk
 import sqlite3
-import os
 
 # Import login page
 from login_page import show_login
@@ -19,44 +18,21 @@ from pages.tenants_page import TenantsPage
 from pages.payments_page import PaymentsPage
 
 # Import database functions
-try:
-    from database import create_database, insert_sample_data, DB_NAME
-    HAS_DATABASE_MODULE = True
-except ImportError:
-    HAS_DATABASE_MODULE = False
-    DB_NAME = "vista_verde.db"
+from database import (create_database, insert_sample_data, create_indexes, get_status_counts,
+                      close_connection, submit_read, run_maintenance)
+
+# Database upkeep runs on the background reader every 5 minutes, never at startup
+MAINTENANCE_INTERVAL_MS = 300_000
 
 def init_db():
-    """Initialize database"""
-    if not os.path.exists(DB_NAME):
-        if HAS_DATABASE_MODULE:
-            print("📦 Database not found. Creating from database.py...")
-            conn, cur = create_database()
-            if conn and cur:
-                insert_sample_data(conn, cur)
-                conn.close()
-                print("✅ Database created successfully!")
-        else:
-            print("⚠️ Warning: database.py not found. Creating basic structure...")
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute('''CREATE TABLE IF NOT EXISTS units (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, unit_number TEXT UNIQUE NOT NULL,
-                unit_type TEXT, monthly_rent REAL, is_occupied INTEGER DEFAULT 0, created_at TEXT)''')
-            cur.execute('''CREATE TABLE IF NOT EXISTS tenants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, full_name TEXT NOT NULL, email TEXT, phone TEXT,
-                unit_id INTEGER, move_in_date TEXT, monthly_rent REAL,
-                FOREIGN KEY (unit_id) REFERENCES units (id) ON DELETE SET NULL)''')
-            cur.execute('''CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER, amount REAL,
-                payment_date TEXT, month_covered TEXT,
-                FOREIGN KEY (tenant_id) REFERENCES tenants (id) ON DELETE CASCADE)''')
-            cur.execute('''CREATE TABLE IF NOT EXISTS utility_bills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, bill_type TEXT NOT NULL, amount REAL NOT NULL,
-                billing_month TEXT NOT NULL, due_date TEXT, paid INTEGER DEFAULT 0, created_at TEXT)''')
-            conn.commit()
-            conn.close()
-            print("✅ Basic database structure created.")
+    """Initialize database; every step is idempotent, so it runs on each start"""
+    # Schema is skipped once user_version is current, sample data once units exist
+    conn, cur = create_database()
+    if conn and cur:
+        insert_sample_data(conn, cur)
+        create_indexes(conn, cur)
+        conn.close()
+        print("✅ Database ready!")
 
 class VistaVerdeApp(tk.Tk):
     def __init__(self):
@@ -77,28 +53,34 @@ class VistaVerdeApp(tk.Tk):
         self.create_sidebar()
         self.create_main_area()
         
-        # Initialize pages
-        self.home_page = HomePage(self.main_frame, self)
-        self.analytics_page = AnalyticsPage(self.main_frame, self)
-        self.units_page = UnitsPage(self.main_frame, self)
-        self.tenants_page = TenantsPage(self.main_frame, self)
-        self.payments_page = PaymentsPage(self.main_frame, self)
+        # Pages are created on first visit by show_page
+        self.pages = {}
         
         # Show home by default
         self.show_home()
+        
+        self.after(MAINTENANCE_INTERVAL_MS, self.run_db_maintenance)
+
+    def run_db_maintenance(self):
+        """Run PRAGMA optimize (and VACUUM when needed) off the Tk thread, then reschedule"""
+        submit_read(run_maintenance).add_done_callback(self.report_maintenance)
+        self.after(MAINTENANCE_INTERVAL_MS, self.run_db_maintenance)
+
+    @staticmethod
+    def report_maintenance(future):
+        error = future.exception()
+        if error:
+            print(f"⚠️ Database maintenance warning: {error}")
 
     def check_database_status(self):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM units"); unit_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM tenants"); tenant_count = cur.fetchone()[0]
-            cur.execute("SELECT COUNT(*) FROM payments"); payment_count = cur.fetchone()[0]
-            conn.close()
-            print(f"\n{'='*50}\n📊 Vista Verde Database Status\n{'='*50}")
-            print(f"🏢 Units: {unit_count}\n👥 Tenants: {tenant_count}\n💰 Payments: {payment_count}\n{'='*50}\n")
-            if unit_count == 0:
-                print("💡 Tip: Run 'python database.py' to add sample data!")
+            # Cached, so the home page's first paint reuses these counts
+            unit_count, _, _, tenant_count, payment_count = get_status_counts()
+            tip = "💡 Tip: Run 'python database.py' to add sample data!\n" if unit_count == 0 else ""
+            # Whole block in one write
+            print(f"\n{'='*50}\n📊 Vista Verde Database Status\n{'='*50}\n"
+                  f"🏢 Units: {unit_count}\n👥 Tenants: {tenant_count}\n💰 Payments: {payment_count}\n{'='*50}\n\n{tip}",
+                  end="")
         except sqlite3.Error as e:
             print(f"⚠️ Database check warning: {e}")
 
@@ -129,44 +111,44 @@ class VistaVerdeApp(tk.Tk):
     def create_main_area(self):
         self.main_frame = tk.Frame(self, bg="#f0f4f8")
         self.main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        # Every page gets its own frame, stacked in this one grid cell
+        self.main_frame.grid_rowconfigure(0, weight=1)
+        self.main_frame.grid_columnconfigure(0, weight=1)
 
-    def clear_main(self):
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+    def show_page(self, page_class):
+        """Build a page into its own frame on first visit; afterwards just refresh and raise it"""
+        page = self.pages.get(page_class)
+        if page is None:
+            frame = tk.Frame(self.main_frame, bg="#f0f4f8")
+            frame.grid(row=0, column=0, sticky="nsew")
+            page = self.pages[page_class] = page_class(frame, self)
+            page.show()
+        else:
+            page.refresh()
+        page.parent.tkraise()
 
     def show_home(self):
-        self.clear_main()
-        self.home_page = HomePage(self.main_frame, self)
-        self.home_page.show()
+        self.show_page(HomePage)
 
     def show_analytics(self):
-        self.clear_main()
-        self.analytics_page = AnalyticsPage(self.main_frame, self)
-        self.analytics_page.show()
+        self.show_page(AnalyticsPage)
 
     def show_units(self):
-        self.clear_main()
-        self.units_page = UnitsPage(self.main_frame, self)
-        self.units_page.show()
+        self.show_page(UnitsPage)
 
     def show_tenants(self):
-        self.clear_main()
-        self.tenants_page = TenantsPage(self.main_frame, self)
-        self.tenants_page.show()
+        self.show_page(TenantsPage)
 
     def show_payments(self):
-        self.clear_main()
-        self.payments_page = PaymentsPage(self.main_frame, self)
-        self.payments_page.show()
+        self.show_page(PaymentsPage)
 
 if __name__ == "__main__":
-    print("\n" + "="*50)
-    print("🏢 Vista Verde Apartments RMS")
-    print("="*50)
+    print(f"\n{'='*50}\n🏢 Vista Verde Apartments RMS\n{'='*50}")
     
     # Show login page first, then show main app on success
     def start_main_app():
         app = VistaVerdeApp()
         app.mainloop()
+        close_connection()
     
     show_login(start_main_app)
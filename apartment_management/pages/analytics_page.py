@@ -5,15 +5,83 @@ Vista Verde Apartments - Analytics Page Module
 import tkinter as tk
 from tkinter import ttk
 import sqlite3
+import time
+from database import submit_read, table_versions, KPI_TTL
 from datetime import datetime
 
 import os
-DB_NAME = "vista_verde.db"
+
+# Pre-bound formatters reused for every row and chart label
+_FMT_PESO = "₱{:,.2f}".format
+_FMT_PESO_WHOLE = "₱{:,.0f}".format
+
+# How often (ms) the Tk thread checks whether a background query has finished
+_POLL_MS = 15
+
+# Quiet period (ms) after the last layout change before the scroll region is recomputed
+_SCROLL_DEBOUNCE_MS = 50
+
+# loader -> (table_versions() it was read at, result, expiry time); reused until one of its
+# tables is written here, or KPI_TTL passes so writes from other processes show up too
+_results = {}
+
+# Every table the panels read; a write to any of them makes refresh() rebuild the panels
+_TABLES = ("payments", "tenants", "units")
+
+# (column, heading, anchor) for the recent payments table
+_RECENT_COLUMNS = (
+    ("tenant", "Tenant", "w"),
+    ("unit", "Unit", "center"),
+    ("amount", "Amount", "e"),
+    ("date", "Date", "center"),
+    ("month", "Month", "center"),
+)
+
+
+# Every dashboard figure in one row: payment totals come from the trigger-maintained
+# apartment_stats row, expected revenue from the occupied units' rents
+_STATS_SQL = '''
+    SELECT s.total_amount, s.total_electric, s.total_water, s.payment_count,
+           COALESCE(s.total_amount / NULLIF(s.payment_count, 0), 0),
+           (SELECT COALESCE(SUM(monthly_rent), 0) FROM units WHERE is_occupied = 1)
+    FROM apartment_stats s WHERE s.id = 1'''
+
+
+def _load_stats(conn):
+    # (total collected, electric, water, payment count, average payment, expected monthly)
+    return conn.execute(_STATS_SQL).fetchone()
+
+
+def _load_monthly_trend(conn):
+    # Latest 12 months, returned oldest first with the chart's peak on every row
+    return conn.execute('''SELECT month_covered, total, MAX(total) OVER () FROM (
+                            SELECT month_covered, SUM(amount) AS total FROM payments
+                            WHERE month_covered IS NOT NULL GROUP BY month_covered
+                            ORDER BY month_covered DESC LIMIT 12)
+                        ORDER BY month_covered''').fetchall()
+
+
+def _load_recent_payments(conn):
+    return conn.execute('''SELECT t.full_name, u.unit_number, p.amount, p.payment_date, p.month_covered
+                        FROM payments p JOIN tenants t ON p.tenant_id = t.id 
+                        LEFT JOIN units u ON t.unit_id = u.id ORDER BY p.payment_date DESC LIMIT 10''').fetchall()
+
+
+def _load_top_tenants(conn):
+    return conn.execute('''SELECT t.full_name, u.unit_number, COUNT(p.id) as payment_count, SUM(p.amount) as total_paid,
+                               MAX(SUM(p.amount)) OVER ()
+                        FROM payments p JOIN tenants t ON p.tenant_id = t.id LEFT JOIN units u ON t.unit_id = u.id
+                        GROUP BY t.id ORDER BY total_paid DESC LIMIT 5''').fetchall()
 
 class AnalyticsPage:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
+        self.content = None
+        self.versions = None
+        self.shown_at = None
+        self.scroll_canvas = None
+        self.scroll_after = None
 
     def show(self):
 
@@ -32,8 +100,8 @@ class AnalyticsPage:
         scrollbar = ttk.Scrollbar(content_wrapper, orient="vertical", command=scroll_canvas.yview)
         scrollable_frame = tk.Frame(scroll_canvas, bg="#f0f4f8")
         
-        scrollable_frame.bind("<Configure>",
-            lambda e: scroll_canvas.configure(scrollregion=scroll_canvas.bbox("all")))
+        # Fires for every layout pass while the panels fill in; only the last one matters
+        scrollable_frame.bind("<Configure>", self.schedule_scrollregion)
         
         scroll_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         scroll_canvas.configure(yscrollcommand=scrollbar.set)
@@ -41,44 +109,72 @@ class AnalyticsPage:
         scroll_canvas.pack(side="left", fill="both", expand=True, padx=40, pady=30)
         scrollbar.pack(side="right", fill="y")
 
-        self.show_stats_summary(scrollable_frame)
-        self.show_monthly_trend(scrollable_frame)
-        self.show_recent_payments(scrollable_frame)
-        self.show_top_tenants(scrollable_frame)
+        self.scroll_canvas = scroll_canvas
+        self.content = scrollable_frame
+        self.show_panels()
+
+    def schedule_scrollregion(self, event=None):
+        """Recompute the scroll region once layout has settled, not on every resize"""
+        if self.scroll_after:
+            self.parent.after_cancel(self.scroll_after)
+        self.scroll_after = self.parent.after(_SCROLL_DEBOUNCE_MS, self.update_scrollregion)
+
+    def update_scrollregion(self):
+        self.scroll_after = None
+        self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox("all"))
+
+    def show_panels(self):
+        self.versions = table_versions(_TABLES)
+        self.shown_at = time.monotonic()
+        self.show_stats_summary(self.content)
+        self.show_monthly_trend(self.content)
+        self.show_recent_payments(self.content)
+        self.show_top_tenants(self.content)
+
+    def refresh(self):
+        """Called when the page is raised again; rebuilds the panels only if the data changed
+        here or they are older than KPI_TTL"""
+        if table_versions(_TABLES) == self.versions and time.monotonic() - self.shown_at < KPI_TTL:
+            return
+        for panel in self.content.winfo_children():
+            panel.destroy()
+        self.show_panels()
+
+    def load_async(self, widget, query, render, tables):
+        """Run query on the database worker, then call render(load) on the Tk thread.
+        load() returns the query result or re-raises its error. The result is
+        reused on later visits until one of the tables it reads is invalidated
+        or KPI_TTL seconds pass."""
+        versions = table_versions(tables)
+        cached = _results.get(query)
+        if cached is not None and cached[0] == versions and time.monotonic() < cached[2]:
+            render(lambda: cached[1])
+            return
+        future = submit_read(query)
+        
+        def poll():
+            if not widget.winfo_exists():
+                return  # page was left before the data arrived
+            if future.done():
+                if future.exception() is None:
+                    # Stamped with the versions from before the read, so a write
+                    # that raced it makes the next visit fetch again
+                    _results[query] = (versions, future.result(), time.monotonic() + KPI_TTL)
+                render(future.result)
+            else:
+                widget.after(_POLL_MS, poll)
+        poll()
 
     def show_stats_summary(self, parent):
         stats_frame = tk.Frame(parent, bg="white", relief="solid", bd=1)
         stats_frame.pack(fill="x", pady=(0, 20))
-        
+        self.load_async(stats_frame, _load_stats, lambda load: self.render_stats_summary(stats_frame, load),
+                        ("payments", "units"))
+
+    def render_stats_summary(self, stats_frame, load):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            
-            # Get total tenant payments
-            cur.execute("SELECT COALESCE(SUM(amount), 0) FROM payments")
-            total_payments = cur.fetchone()[0]
-            
-            # Get total electric bill from utility_bills table
-            cur.execute("SELECT COALESCE(SUM(electric_bill), 0) FROM payments")
-            electric_bill = cur.fetchone()[0]
-            
-            # Get total water bill from utility_bills table
-            cur.execute("SELECT COALESCE(SUM(water_bill), 0) FROM payments")
-            water_bill = cur.fetchone()[0]
-            
-            # Get payment count
-            cur.execute("SELECT COUNT(*) FROM payments")
-            payment_count = cur.fetchone()[0]
-            
-            # Get average payment
-            cur.execute("SELECT COALESCE(AVG(amount), 0) FROM payments")
-            avg_payment = cur.fetchone()[0]
-            
-            # Get expected monthly revenue
-            cur.execute("SELECT COALESCE(SUM(monthly_rent), 0) FROM units WHERE is_occupied = 1")
-            expected_monthly = cur.fetchone()[0]
-            
-            conn.close()
+            (total_payments, electric_bill, water_bill,
+             payment_count, avg_payment, expected_monthly) = load()
             
             tk.Label(stats_frame, text="Payment Summary Dashboard", font=("Helvetica", 16, "bold"),
                     bg="white").pack(pady=15)
@@ -127,15 +223,12 @@ class AnalyticsPage:
     def draw_monthly_trend(self, parent):
         graph_canvas = tk.Canvas(parent, bg="white", highlightthickness=0)
         graph_canvas.pack(fill="both", expand=True)
-        
+        self.load_async(graph_canvas, _load_monthly_trend,
+                        lambda load: self.render_monthly_trend(graph_canvas, load), ("payments",))
+
+    def render_monthly_trend(self, graph_canvas, load):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute('''SELECT month_covered, SUM(amount) as total FROM payments 
-                          WHERE month_covered IS NOT NULL GROUP BY month_covered 
-                          ORDER BY month_covered DESC LIMIT 12''')
-            monthly_data = list(reversed(cur.fetchall()))
-            conn.close()
+            monthly_data = load()
             
             if not monthly_data:
                 graph_canvas.create_text(450, 200, text="No monthly data available",
@@ -146,7 +239,7 @@ class AnalyticsPage:
             margin_left, margin_right, margin_top, margin_bottom = 80, 40, 40, 80
             graph_width = width - margin_left - margin_right
             graph_height = height - margin_top - margin_bottom
-            max_amount = max(d[1] for d in monthly_data)
+            max_amount = monthly_data[0][2]
             
             # Draw axes
             graph_canvas.create_line(margin_left, height - margin_bottom, width - margin_right,
@@ -156,7 +249,7 @@ class AnalyticsPage:
             
             # Plot data
             points = []
-            for i, (month, amount) in enumerate(monthly_data):
+            for i, (month, amount, _) in enumerate(monthly_data):
                 x = margin_left + (i * graph_width / (len(monthly_data) - 1)) if len(monthly_data) > 1 else margin_left + graph_width / 2
                 y = height - margin_bottom - (amount / max_amount * graph_height) if max_amount > 0 else height - margin_bottom
                 points.append((x, y))
@@ -168,9 +261,9 @@ class AnalyticsPage:
                     graph_canvas.create_line(points[i][0], points[i][1], points[i+1][0], points[i+1][1],
                                            width=3, fill="#1976d2", smooth=True)
             
-            for i, ((month, amount), (x, y)) in enumerate(zip(monthly_data, points)):
+            for i, ((month, amount, _), (x, y)) in enumerate(zip(monthly_data, points)):
                 graph_canvas.create_oval(x-6, y-6, x+6, y+6, fill="#1976d2", outline="#0d47a1", width=2)
-                graph_canvas.create_text(x, y - 20, text=f"₱{amount:,.0f}",
+                graph_canvas.create_text(x, y - 20, text=_FMT_PESO_WHOLE(amount),
                                        font=("Helvetica", 9, "bold"), fill="#1976d2")
                 month_label = month[5:] if len(month) > 2 else month
                 graph_canvas.create_text(x, height - margin_bottom + 20, text=month_label,
@@ -179,7 +272,7 @@ class AnalyticsPage:
             for i in range(6):
                 y = height - margin_bottom - (i * graph_height / 5)
                 amount = (i * max_amount / 5)
-                graph_canvas.create_text(margin_left - 15, y, text=f"₱{amount:,.0f}",
+                graph_canvas.create_text(margin_left - 15, y, text=_FMT_PESO_WHOLE(amount),
                                        font=("Helvetica", 9), fill="#555", anchor="e")
                 graph_canvas.create_line(margin_left - 5, y, margin_left, y, fill="#ccc", width=1)
                 graph_canvas.create_line(margin_left, y, width - margin_right, y,
@@ -196,35 +289,27 @@ class AnalyticsPage:
         table_frame.pack(fill="x", pady=(0, 20))
         tk.Label(table_frame, text="Recent Payments (Last 10)", font=("Helvetica", 14, "bold"),
                 bg="white").pack(pady=15)
-        
+        self.load_async(table_frame, _load_recent_payments,
+                        lambda load: self.render_recent_payments(table_frame, load),
+                        ("payments", "tenants", "units"))
+
+    def render_recent_payments(self, table_frame, load):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute('''SELECT t.full_name, u.unit_number, p.amount, p.payment_date, p.month_covered
-                          FROM payments p JOIN tenants t ON p.tenant_id = t.id 
-                          LEFT JOIN units u ON t.unit_id = u.id ORDER BY p.payment_date DESC LIMIT 10''')
-            recent = cur.fetchall()
-            conn.close()
+            recent = load()
             
             if recent:
-                table = tk.Frame(table_frame, bg="white")
-                table.pack(padx=30, pady=(0, 20))
-                headers = ["Tenant", "Unit", "Amount", "Date", "Month"]
-                for i, header in enumerate(headers):
-                    tk.Label(table, text=header, font=("Helvetica", 11, "bold"), bg="#eceff1",
-                           width=18, anchor="w", padx=10, pady=8, relief="solid", bd=1).grid(row=0, column=i, sticky="ew")
-                for row_idx, (name, unit, amount, date, month) in enumerate(recent, 1):
-                    bg_color = "#f5f5f5" if row_idx % 2 == 0 else "white"
-                    tk.Label(table, text=name, font=("Helvetica", 10), bg=bg_color, width=18,
-                           anchor="w", padx=10, pady=6, relief="solid", bd=1).grid(row=row_idx, column=0, sticky="ew")
-                    tk.Label(table, text=unit or "—", font=("Helvetica", 10), bg=bg_color, width=18,
-                           anchor="center", padx=10, pady=6, relief="solid", bd=1).grid(row=row_idx, column=1, sticky="ew")
-                    tk.Label(table, text=f"₱{amount:,.2f}", font=("Helvetica", 10, "bold"), bg=bg_color,
-                           fg="#2e7d32", width=18, anchor="e", padx=10, pady=6, relief="solid", bd=1).grid(row=row_idx, column=2, sticky="ew")
-                    tk.Label(table, text=date, font=("Helvetica", 10), bg=bg_color, width=18,
-                           anchor="center", padx=10, pady=6, relief="solid", bd=1).grid(row=row_idx, column=3, sticky="ew")
-                    tk.Label(table, text=month, font=("Helvetica", 10), bg=bg_color, width=18,
-                           anchor="center", padx=10, pady=6, relief="solid", bd=1).grid(row=row_idx, column=4, sticky="ew")
+                # One Treeview instead of a Label per cell
+                table = ttk.Treeview(table_frame, columns=[col for col, _, _ in _RECENT_COLUMNS],
+                                     show="headings", height=len(recent))
+                table.pack(fill="x", padx=30, pady=(0, 20))
+                for col, text, anchor in _RECENT_COLUMNS:
+                    table.heading(col, text=text)
+                    table.column(col, anchor=anchor, width=180)
+                table.tag_configure("odd", background="#f5f5f5")
+                insert, odd, even = table.insert, ("odd",), ()
+                for row_idx, (name, unit, amount, date, month) in enumerate(recent):
+                    insert("", "end", values=(name, unit or "—", _FMT_PESO(amount), date, month),
+                           tags=odd if row_idx % 2 else even)
             else:
                 tk.Label(table_frame, text="No recent payments", font=("Helvetica", 12),
                         bg="white", fg="#999").pack(pady=20)
@@ -237,34 +322,33 @@ class AnalyticsPage:
         top_frame.pack(fill="x", pady=(0, 20))
         tk.Label(top_frame, text="Top Paying Tenants (Total Contributions)",
                 font=("Helvetica", 14, "bold"), bg="white").pack(pady=15)
-        
+        self.load_async(top_frame, _load_top_tenants, lambda load: self.render_top_tenants(top_frame, load),
+                        ("payments", "tenants", "units"))
+
+    def render_top_tenants(self, top_frame, load):
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute('''SELECT t.full_name, u.unit_number, COUNT(p.id) as payment_count, SUM(p.amount) as total_paid
-                          FROM payments p JOIN tenants t ON p.tenant_id = t.id LEFT JOIN units u ON t.unit_id = u.id
-                          GROUP BY t.id ORDER BY total_paid DESC LIMIT 5''')
-            top_tenants = cur.fetchall()
-            conn.close()
+            top_tenants = load()
             
             if top_tenants:
                 chart_canvas = tk.Canvas(top_frame, bg="white", height=300, highlightthickness=0)
                 chart_canvas.pack(fill="x", padx=30, pady=(0, 20))
-                max_amount = max(t[3] for t in top_tenants)
+                max_amount = top_tenants[0][4]
                 bar_height, spacing, start_y, max_bar_width = 40, 15, 20, 600
-                for i, (name, unit, count, total) in enumerate(top_tenants):
+                create_oval, create_text = chart_canvas.create_oval, chart_canvas.create_text
+                create_rectangle = chart_canvas.create_rectangle
+                for i, (name, unit, count, total, _) in enumerate(top_tenants):
                     y = start_y + i * (bar_height + spacing)
                     bar_width = (total / max_amount * max_bar_width) if max_amount > 0 else 0
-                    chart_canvas.create_oval(20, y, 50, y + 30, fill="#1976d2", outline="#0d47a1", width=2)
-                    chart_canvas.create_text(35, y + 15, text=str(i+1), font=("Helvetica", 14, "bold"), fill="white")
-                    chart_canvas.create_text(70, y + 8, text=name, font=("Helvetica", 11, "bold"), anchor="w", fill="#2c3e50")
-                    chart_canvas.create_text(70, y + 24, text=f"Unit {unit} • {count} payments",
-                                           font=("Helvetica", 9), anchor="w", fill="#666")
+                    create_oval(20, y, 50, y + 30, fill="#1976d2", outline="#0d47a1", width=2)
+                    create_text(35, y + 15, text=str(i+1), font=("Helvetica", 14, "bold"), fill="white")
+                    create_text(70, y + 8, text=name, font=("Helvetica", 11, "bold"), anchor="w", fill="#2c3e50")
+                    create_text(70, y + 24, text=f"Unit {unit} • {count} payments",
+                                font=("Helvetica", 9), anchor="w", fill="#666")
                     bar_x = 300
-                    chart_canvas.create_rectangle(bar_x, y + 5, bar_x + bar_width, y + bar_height - 5,
-                                                 fill="#4caf50", outline="#388e3c", width=2)
-                    chart_canvas.create_text(bar_x + bar_width + 10, y + 20, text=f"₱{total:,.2f}",
-                                           font=("Helvetica", 11, "bold"), anchor="w", fill="#2e7d32")
+                    create_rectangle(bar_x, y + 5, bar_x + bar_width, y + bar_height - 5,
+                                     fill="#4caf50", outline="#388e3c", width=2)
+                    create_text(bar_x + bar_width + 10, y + 20, text=_FMT_PESO(total),
+                                font=("Helvetica", 11, "bold"), anchor="w", fill="#2e7d32")
                 chart_canvas.config(width=900)
             else:
                 tk.Label(top_frame, text="No payment data available", font=("Helvetica", 12),
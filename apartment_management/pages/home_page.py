@@ -4,18 +4,19 @@ Vista Verde Apartments - Home Page Module
 """
 import tkinter as tk
 import sqlite3
-
-DB_NAME = "vista_verde.db"
+from database import get_status_counts
 
 class HomePage:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
+        self.center = None
+        self.stats_frame = None
 
     def show(self):
         canvas = tk.Canvas(self.parent, bg="#00a8b5", highlightthickness=0)
         canvas.pack(fill="both", expand=True)
-        center = tk.Frame(canvas, bg="#00a8b5")
+        center = self.center = tk.Frame(canvas, bg="#00a8b5")
         center.place(relx=0.5, rely=0.5, anchor="center")
 
         # Logo
@@ -32,24 +33,19 @@ class HomePage:
         
         self.show_database_info(center)
 
+    def refresh(self):
+        """Called when the page is raised again; only the figures are rebuilt"""
+        if self.stats_frame is not None:
+            self.stats_frame.destroy()
+        self.show_database_info(self.center)
+
     def show_database_info(self, parent):
         """Show database statistics on home screen"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            
-            cur.execute("SELECT COUNT(*) FROM units WHERE is_occupied = 0")
-            available = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM units WHERE is_occupied = 1")
-            occupied = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM tenants")
-            tenants = cur.fetchone()[0]
-            
-            conn.close()
+            # Same cached row check_database_status() loaded at startup; writes invalidate it
+            _, available, occupied, tenants, _ = get_status_counts()
             
-            stats_frame = tk.Frame(parent, bg="#00a8b5")
+            stats_frame = self.stats_frame = tk.Frame(parent, bg="#00a8b5")
             stats_frame.pack(pady=30)
             
             stats = [
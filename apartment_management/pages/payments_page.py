@@ -4,16 +4,46 @@ Vista Verde Apartments - Payments Page Module
 """
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
+from database import get_connection, cached_query, table_versions
 from dialogs.record_payment_dialog import RecordPaymentDialog
+from widgets.lazy_treeview import LazyTreeview
 
-DB_NAME = "vista_verde.db"
+# Pre-bound formatter reused for every row
+_FMT_PESO = "₱{:,.2f}".format
+
+# (column, heading, width) for the payments table
+_COLUMNS = (
+    ("tenant", "Tenant", 200),
+    ("unit", "Unit", 200),
+    ("amount", "Amount", 200),
+    ("month", "Month Covered", 200),
+    ("date", "Paid On", 200),
+)
+
+_SELECT_PAYMENTS = '''
+    SELECT t.full_name, COALESCE(NULLIF(u.unit_number, ''), '—'), p.amount,
+           p.month_covered, p.payment_date
+    FROM payments p
+    JOIN tenants t ON p.tenant_id = t.id
+    LEFT JOIN units u ON t.unit_id = u.id'''
+_PAGE_PAYMENTS = _SELECT_PAYMENTS + " ORDER BY p.payment_date DESC, p.id DESC LIMIT ? OFFSET ?"
+_ONE_PAYMENT = _SELECT_PAYMENTS + " WHERE p.id = ?"
+
+# Tables the listing reads; a write to any of them makes refresh() reload
+_TABLES = ("payments", "tenants", "units")
+
+def _payment_values(rows):
+    return [
+        (name, unit, _FMT_PESO(amount), month, paid_on)
+        for name, unit, amount, month, paid_on in rows
+    ]
 
 class PaymentsPage:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
         self.tree_payments = None
+        self.versions = None
 
     def show(self):
         # Header
@@ -27,18 +57,17 @@ class PaymentsPage:
                   command=self.record_payment).pack(side="right", padx=20)
 
         # Treeview
-        cols = ("tenant", "unit", "amount", "month", "date")
-        self.tree_payments = ttk.Treeview(self.parent, columns=cols, show="headings")
+        cols = [c for c, _, _ in _COLUMNS]
+        self.tree_payments = LazyTreeview(self.parent, self.fetch_payments, columns=cols, show="headings")
         self.tree_payments.pack(fill="both", expand=True, padx=10, pady=10)
         
-        headings = ["Tenant", "Unit", "Amount", "Month Covered", "Paid On"]
-        for c, h in zip(cols, headings):
+        for c, h, w in _COLUMNS:
             self.tree_payments.heading(c, text=h)
-            self.tree_payments.column(c, anchor="center", width=200)
+            self.tree_payments.column(c, anchor="center", width=w)
 
         # Scrollbar
         scrollbar = ttk.Scrollbar(self.parent, orient="vertical", command=self.tree_payments.yview)
-        self.tree_payments.configure(yscrollcommand=scrollbar.set)
+        self.tree_payments.set_scrollbar(scrollbar)
         scrollbar.pack(side="right", fill="y")
         
         self.load_payments()
@@ -46,23 +75,33 @@ class PaymentsPage:
     def load_payments(self):
         if not self.tree_payments:
             return
-        for i in self.tree_payments.get_children():
-            self.tree_payments.delete(i)
-        
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT t.full_name, u.unit_number, p.amount, p.month_covered, p.payment_date
-            FROM payments p
-            JOIN tenants t ON p.tenant_id = t.id
-            LEFT JOIN units u ON t.unit_id = u.id
-            ORDER BY p.payment_date DESC
-        ''')
-        for row in cur.fetchall():
-            self.tree_payments.insert("", "end", values=(
-                row[0], row[1] or "—", f"₱{row[2]:,.2f}", row[3], row[4]
-            ))
-        conn.close()
+        self.versions = table_versions(_TABLES)
+        self.tree_payments.reload()
+
+    def refresh(self):
+        """Called when the page is raised again; reloads only if its tables changed"""
+        if table_versions(_TABLES) != self.versions:
+            self.load_payments()
+
+    def fetch_payments(self, offset, limit):
+        rows = cached_query(_PAGE_PAYMENTS, (limit, offset), tables=_TABLES)
+        return _payment_values(rows)
 
     def record_payment(self):
-        RecordPaymentDialog(self.app, self.load_payments)
+        RecordPaymentDialog(self.app, self.on_payment_recorded)
+
+    def on_payment_recorded(self, payment_id):
+        """Insert just the new payment at its position in the newest-first order"""
+        if not self.tree_payments:
+            return
+        conn = get_connection()
+        rows = conn.execute(_ONE_PAYMENT, (payment_id,)).fetchall()
+        paid_on = rows[0][4]
+        # Later-dated payments (e.g. bulk-loaded ones) still sort above it
+        index = conn.execute(
+            "SELECT COUNT(*) FROM payments WHERE payment_date > ? OR (payment_date = ? AND id > ?)",
+            (paid_on, paid_on, payment_id)
+        ).fetchone()[0]
+        self.tree_payments.insert_row(index, _payment_values(rows)[0])
+        # The tree now matches the tables, so refresh() has nothing to reload
+        self.versions = table_versions(_TABLES)
@@ -4,16 +4,47 @@ Vista Verde Apartments - Tenants Page Module
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
+from database import get_connection, cached_query, invalidate_cache, table_versions
 from dialogs.add_tenant_dialog import AddTenantDialog
+from widgets.lazy_treeview import LazyTreeview
 
-DB_NAME = "vista_verde.db"
+# Pre-bound formatter reused for every row
+_FMT_PESO = "₱{:,.2f}".format
+
+# (column, heading, width) for the tenants table
+_COLUMNS = (
+    ("id", "ID", 70),
+    ("name", "Full Name", 160),
+    ("email", "Email", 160),
+    ("phone", "Phone", 160),
+    ("unit", "Unit", 160),
+    ("move_in", "Move-In", 160),
+    ("rent", "Rent", 160),
+)
+
+_SELECT_TENANTS = '''
+    SELECT t.id, t.full_name, COALESCE(NULLIF(t.email, ''), '—'),
+           COALESCE(NULLIF(t.phone, ''), '—'), COALESCE(NULLIF(u.unit_number, ''), '—'),
+           t.move_in_date, u.monthly_rent
+    FROM tenants t LEFT JOIN units u ON t.unit_id = u.id'''
+_PAGE_TENANTS = _SELECT_TENANTS + " ORDER BY t.id LIMIT ? OFFSET ?"
+_ONE_TENANT = _SELECT_TENANTS + " WHERE t.id = ?"
+
+# Tables the listing reads; a write to any of them makes refresh() reload
+_TABLES = ("tenants", "units")
+
+def _tenant_values(rows):
+    return [
+        row[:6] + (_FMT_PESO(row[6]) if row[6] else "—",)
+        for row in rows
+    ]
 
 class TenantsPage:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
         self.tree_tenants = None
+        self.versions = None
 
     def show(self):
         # Header
@@ -29,19 +60,18 @@ class TenantsPage:
         ttk.Button(btns, text="Delete Tenant", command=self.delete_tenant).pack(side="right", padx=5)
 
         # Treeview
-        cols = ("id", "name", "email", "phone", "unit", "move_in", "rent")
-        self.tree_tenants = ttk.Treeview(self.parent, columns=cols, show="headings")
+        cols = [c for c, _, _ in _COLUMNS]
+        self.tree_tenants = LazyTreeview(self.parent, self.fetch_tenants, iid_column=0,
+                                         columns=cols, show="headings")
         self.tree_tenants.pack(fill="both", expand=True)
         
-        headings = ["ID", "Full Name", "Email", "Phone", "Unit", "Move-In", "Rent"]
-        for c, h in zip(cols, headings):
+        for c, h, w in _COLUMNS:
             self.tree_tenants.heading(c, text=h)
-            self.tree_tenants.column(c, anchor="center", width=160)
-        self.tree_tenants.column("id", width=70)
+            self.tree_tenants.column(c, anchor="center", width=w)
 
         # Scrollbar
         scrollbar = ttk.Scrollbar(self.parent, orient="vertical", command=self.tree_tenants.yview)
-        self.tree_tenants.configure(yscrollcommand=scrollbar.set)
+        self.tree_tenants.set_scrollbar(scrollbar)
         scrollbar.pack(side="right", fill="y")
         
         self.load_tenants()
@@ -49,25 +79,29 @@ class TenantsPage:
     def load_tenants(self):
         if not self.tree_tenants:
             return
-        for i in self.tree_tenants.get_children():
-            self.tree_tenants.delete(i)
-        
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT t.id, t.full_name, t.email, t.phone, u.unit_number, t.move_in_date, t.monthly_rent
-            FROM tenants t LEFT JOIN units u ON t.unit_id = u.id
-        ''')
-        for row in cur.fetchall():
-            unit = row[4] if row[4] else "—"
-            rent = f"₱{row[6]:,.2f}" if row[6] else "—"
-            self.tree_tenants.insert("", "end", values=(
-                row[0], row[1], row[2] or "—", row[3] or "—", unit, row[5], rent
-            ))
-        conn.close()
+        self.versions = table_versions(_TABLES)
+        self.tree_tenants.reload()
+
+    def refresh(self):
+        """Called when the page is raised again; reloads only if its tables changed"""
+        if table_versions(_TABLES) != self.versions:
+            self.load_tenants()
+
+    def fetch_tenants(self, offset, limit):
+        rows = cached_query(_PAGE_TENANTS, (limit, offset), tables=_TABLES)
+        return _tenant_values(rows)
 
     def add_tenant(self):
-        AddTenantDialog(self.app, self.load_tenants)
+        AddTenantDialog(self.app, self.on_tenant_added)
+
+    def on_tenant_added(self, tenant_id):
+        """Append just the new tenant; ids only grow, so it always sorts last"""
+        if not self.tree_tenants:
+            return
+        rows = get_connection().execute(_ONE_TENANT, (tenant_id,)).fetchall()
+        self.tree_tenants.insert_row(self.tree_tenants.loaded, _tenant_values(rows)[0])
+        # The tree now matches the tables, so refresh() has nothing to reload
+        self.versions = table_versions(_TABLES)
 
     def delete_tenant(self):
         if not self.tree_tenants:
@@ -76,10 +110,11 @@ class TenantsPage:
         if not sel:
             return messagebox.showwarning("Select", "Please select a tenant")
         
-        tenant_id = self.tree_tenants.item(sel[0])["values"][0]
+        tenant_id = int(sel[0])
         if messagebox.askyesno("Delete", "Delete this tenant and all payments?"):
-            conn = sqlite3.connect(DB_NAME)
-            conn.execute("DELETE FROM tenants WHERE id=?", (tenant_id,))
-            conn.commit()
-            conn.close()
-            self.load_tenants()
+            with get_connection() as conn:
+                conn.execute("DELETE FROM tenants WHERE id=?", (tenant_id,))
+            # Frees the unit and cascades to the tenant's payments
+            invalidate_cache("tenants", "units", "payments")
+            self.tree_tenants.remove_row(sel[0])
+            self.versions = table_versions(_TABLES)
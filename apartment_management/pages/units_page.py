@@ -4,16 +4,42 @@ Vista Verde Apartments - Units Page Module
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
+from database import get_connection, cached_query, invalidate_cache, UNIT_COLUMNS, table_versions
 from dialogs.add_unit_dialog import AddUnitDialog
+from widgets.lazy_treeview import LazyTreeview
 
-DB_NAME = "vista_verde.db"
+# Pre-bound formatter reused for every row
+_FMT_PESO = "₱{:,.2f}".format
+
+# (column, heading, width) for the units table
+_COLUMNS = (
+    ("id", "ID", 70),
+    ("unit_number", "Unit Number", 150),
+    ("unit_type", "Type", 150),
+    ("rent", "Monthly Rent", 150),
+    ("occupied", "Occupied", 150),
+    ("created", "Created", 150),
+)
+
+_SELECT_UNITS = f"SELECT {UNIT_COLUMNS} FROM units"
+_PAGE_UNITS = _SELECT_UNITS + " ORDER BY unit_number LIMIT ? OFFSET ?"
+
+# Tables the listing reads; a write to any of them makes refresh() reload
+_TABLES = ("units",)
+
+def _unit_values(rows):
+    # SQLite's printf() groups thousands only for integers, so rent is formatted here
+    return [
+        (unit_id, number, unit_type, _FMT_PESO(rent), occupied, created)
+        for unit_id, number, unit_type, rent, occupied, created in rows
+    ]
 
 class UnitsPage:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
         self.tree_units = None
+        self.versions = None
 
     def show(self):
         # Header
@@ -29,18 +55,18 @@ class UnitsPage:
         ttk.Button(btns, text="Delete Unit", command=self.delete_unit).pack(side="right", padx=5)
 
         # Treeview
-        columns = ("id", "unit_number", "unit_type", "rent", "occupied", "created")
-        self.tree_units = ttk.Treeview(self.parent, columns=columns, show="headings")
+        columns = [col for col, _, _ in _COLUMNS]
+        self.tree_units = LazyTreeview(self.parent, self.fetch_units, iid_column=0,
+                                       columns=columns, show="headings")
         self.tree_units.pack(fill="both", expand=True)
         
-        for col, text in zip(columns, ["ID", "Unit Number", "Type", "Monthly Rent", "Occupied", "Created"]):
+        for col, text, width in _COLUMNS:
             self.tree_units.heading(col, text=text)
-            self.tree_units.column(col, anchor="center", width=150)
-        self.tree_units.column("id", width=70)
+            self.tree_units.column(col, anchor="center", width=width)
 
         # Scrollbar
         scrollbar = ttk.Scrollbar(self.parent, orient="vertical", command=self.tree_units.yview)
-        self.tree_units.configure(yscrollcommand=scrollbar.set)
+        self.tree_units.set_scrollbar(scrollbar)
         scrollbar.pack(side="right", fill="y")
         
         self.load_units()
@@ -48,21 +74,31 @@ class UnitsPage:
     def load_units(self):
         if not self.tree_units:
             return
-        for i in self.tree_units.get_children():
-            self.tree_units.delete(i)
-        
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM units ORDER BY unit_number")
-        for row in cur.fetchall():
-            occupied = "Yes" if row[4] else "No"
-            self.tree_units.insert("", "end", values=(
-                row[0], row[1], row[2], f"₱{row[3]:,.2f}", occupied, row[5]
-            ))
-        conn.close()
+        self.versions = table_versions(_TABLES)
+        self.tree_units.reload()
+
+    def refresh(self):
+        """Called when the page is raised again; reloads only if its tables changed"""
+        if table_versions(_TABLES) != self.versions:
+            self.load_units()
+
+    def fetch_units(self, offset, limit):
+        rows = cached_query(_PAGE_UNITS, (limit, offset), tables=_TABLES)
+        return _unit_values(rows)
 
     def add_unit(self):
-        AddUnitDialog(self.app, self.load_units)
+        AddUnitDialog(self.app, self.on_unit_added)
+
+    def on_unit_added(self, row):
+        """Insert just the new unit (as returned by add_unit) at its sorted position"""
+        if not self.tree_units:
+            return
+        index = get_connection().execute(
+            "SELECT COUNT(*) FROM units WHERE unit_number < ?", (row[1],)
+        ).fetchone()[0]
+        self.tree_units.insert_row(index, _unit_values([row])[0])
+        # The tree now matches the table, so refresh() has nothing to reload
+        self.versions = table_versions(_TABLES)
 
     def delete_unit(self):
         if not self.tree_units:
@@ -71,10 +107,11 @@ class UnitsPage:
         if not sel:
             return messagebox.showwarning("Select", "Please select a unit")
         
-        unit_id = self.tree_units.item(sel[0])["values"][0]
+        unit_id = int(sel[0])
         if messagebox.askyesno("Delete", "Delete this unit?"):
-            conn = sqlite3.connect(DB_NAME)
-            conn.execute("DELETE FROM units WHERE id=?", (unit_id,))
-            conn.commit()
-            conn.close()
-            self.load_units()
+            with get_connection() as conn:
+                conn.execute("DELETE FROM units WHERE id=?", (unit_id,))
+            # Tenants of the unit are unassigned (ON DELETE SET NULL)
+            invalidate_cache("units", "tenants")
+            self.tree_units.remove_row(sel[0])
+            self.versions = table_versions(_TABLES)
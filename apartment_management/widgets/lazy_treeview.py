@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Vista Verde Apartments - Lazy Treeview Widget
+Loads rows page by page as the user scrolls instead of all at once
+"""
+from tkinter import ttk
+
+
+class LazyTreeview(ttk.Treeview):
+    PAGE_SIZE = 100
+    # Fetch the next page once the bottom of the view passes this fraction
+    LOAD_THRESHOLD = 0.9
+
+    def __init__(self, parent, fetch_page, iid_column=None, **kwargs):
+        """fetch_page(offset, limit) must return a list of row value tuples.
+        When iid_column is given, that value (the row's database id) becomes
+        the item id, so selection() hands back ids directly."""
+        super().__init__(parent, **kwargs)
+        self.fetch_page = fetch_page
+        self.iid_column = iid_column
+        self.scrollbar = None
+        self.loaded = 0
+        self.has_more = False
+        self._load_pending = False
+        self.configure(yscrollcommand=self._on_scroll)
+
+    def set_scrollbar(self, scrollbar):
+        self.scrollbar = scrollbar
+
+    def reload(self):
+        """Drop every row and fetch the first page again"""
+        self.delete(*self.get_children())
+        self.loaded = 0
+        self.has_more = True
+        self.load_more()
+
+    def load_more(self):
+        self._load_pending = False
+        if not self.has_more:
+            return
+        rows = self.fetch_page(self.loaded, self.PAGE_SIZE)
+        # Straight to the Tcl command: a values tuple goes over as a Tcl list,
+        # skipping Treeview.insert's per-row option formatting and string join
+        call, widget = self.tk.call, self._w
+        key = self.iid_column
+        if key is None:
+            for values in rows:
+                call(widget, "insert", "", "end", "-values", values)
+        else:
+            for values in rows:
+                call(widget, "insert", "", "end", "-id", values[key], "-values", values)
+        self.loaded += len(rows)
+        self.has_more = len(rows) == self.PAGE_SIZE
+
+    def insert_row(self, index, values):
+        """Place a single new row at index instead of reloading everything.
+        A row that falls past the loaded window is left for load_more."""
+        if index >= self.loaded and self.has_more:
+            return
+        iid = None if self.iid_column is None else values[self.iid_column]
+        self.insert("", index, iid=iid, values=values)
+        self.loaded += 1
+
+    def remove_row(self, iid):
+        """Drop a single row, keeping the paging offset in step"""
+        self.delete(iid)
+        self.loaded -= 1
+
+    def _on_scroll(self, first, last):
+        if self.scrollbar:
+            self.scrollbar.set(first, last)
+        # Also fires while the first page does not fill the view yet
+        if self.has_more and not self._load_pending and float(last) >= self.LOAD_THRESHOLD:
+            self._load_pending = True
+            self.after_idle(self.load_more)
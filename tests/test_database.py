@@ -7,14 +7,40 @@ import sqlite3
 import os
 import sys
 import time
+import threading
 from datetime import datetime
+from unittest import mock
 
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'apartment_management')))
+
+import database
 
 # Test database name
 TEST_DB = "test_vista_verde.db"
 
+# Tables as the original database.py created them, before user_version was tracked
+BASELINE_SCHEMA = '''
+CREATE TABLE units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, unit_number TEXT UNIQUE NOT NULL, unit_type TEXT,
+    monthly_rent REAL, is_occupied INTEGER DEFAULT 0, created_at TEXT,
+    CONSTRAINT chk_occupied CHECK (is_occupied IN (0, 1)));
+CREATE TABLE tenants (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, full_name TEXT NOT NULL, email TEXT, phone TEXT,
+    unit_id INTEGER, move_in_date TEXT, monthly_rent REAL,
+    FOREIGN KEY (unit_id) REFERENCES units(id) ON DELETE SET NULL);
+CREATE TABLE payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, tenant_id INTEGER NOT NULL, amount REAL NOT NULL,
+    rent_amount REAL, electric_bill REAL, water_bill REAL, payment_date TEXT NOT NULL, month_covered TEXT,
+    FOREIGN KEY (tenant_id) REFERENCES tenants(id) ON DELETE CASCADE);
+INSERT INTO units (unit_number, unit_type, monthly_rent, is_occupied) VALUES ('101', 'Studio', 8000.00, 1);
+INSERT INTO units (unit_number, unit_type, monthly_rent, is_occupied) VALUES ('102', 'Studio', 8000.00, 0);
+INSERT INTO tenants (full_name, unit_id, move_in_date, monthly_rent) VALUES ('John Doe', 1, '2024-01-15', 8000.00);
+INSERT INTO payments (tenant_id, amount, electric_bill, water_bill, payment_date, month_covered)
+    VALUES (1, 8800.00, 500.00, 300.00, '2024-02-01', '2024-02');
+'''
+
 class TestDatabaseOperations(unittest.TestCase):
     """Test database CRUD operations"""
     
@@ -430,6 +456,449 @@ class TestLoginValidation(unittest.TestCase):
         self.assertFalse(is_valid, "Password should be case-sensitive")
 
 
+class TestDatabaseModule(unittest.TestCase):
+    """Test the shared connection and helpers in database.py"""
+    
+    def setUp(self):
+        """Point the shared connection at a fresh test database"""
+        TestDatabaseOperations._cleanup_database()
+        self.original_db_name = database.DB_NAME
+        database.DB_NAME = TEST_DB
+        self.conn = database.get_connection()
+        self.conn.execute("CREATE TABLE units (id INTEGER PRIMARY KEY, unit_number TEXT)")
+        self.conn.execute("INSERT INTO units (unit_number) VALUES ('101')")
+        self.conn.execute("CREATE TABLE payments (id INTEGER PRIMARY KEY, tenant_id INTEGER, amount REAL)")
+        self.conn.commit()
+    
+    def tearDown(self):
+        """Close the shared connection and restore the real database name"""
+        database.close_connection()
+        database.DB_NAME = self.original_db_name
+        time.sleep(0.05)
+        TestDatabaseOperations._cleanup_database()
+    
+    def test_01_connection_is_shared(self):
+        """Test that the same WAL connection is reused"""
+        print("\n✅ Test: Shared Connection")
+        
+        self.assertIs(database.get_connection(), self.conn, "Connection should be reused")
+        journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal", "Shared connection should use WAL")
+    
+    def test_02_cached_rows_reused(self):
+        """Test that cached rows are returned until invalidated"""
+        print("\n✅ Test: Query Cache Reuse")
+        
+        sql = "SELECT unit_number FROM units ORDER BY id"
+        self.assertEqual(database.cached_query(sql, tables=("units",)), [("101",)])
+        
+        self.conn.execute("INSERT INTO units (unit_number) VALUES ('102')")
+        self.conn.commit()
+        self.assertEqual(database.cached_query(sql, tables=("units",)), [("101",)],
+                         "Cached rows should be reused before invalidation")
+    
+    def test_03_invalidate_by_table(self):
+        """Test that invalidating a table refreshes only queries reading it"""
+        print("\n✅ Test: Query Cache Invalidation")
+        
+        sql = "SELECT unit_number FROM units ORDER BY id"
+        database.cached_query(sql, tables=("units",))
+        self.conn.execute("INSERT INTO units (unit_number) VALUES ('102')")
+        self.conn.commit()
+        
+        database.invalidate_cache("payments")
+        self.assertEqual(len(database.cached_query(sql, tables=("units",))), 1,
+                         "Unrelated invalidation should keep the cached rows")
+        
+        database.invalidate_cache("units")
+        self.assertEqual(len(database.cached_query(sql, tables=("units",))), 2,
+                         "Invalidating units should refetch")
+    
+    def test_04_totals_for_tenants(self):
+        """Test batched per-tenant payment totals"""
+        print("\n✅ Test: Totals For Tenants")
+        
+        self.conn.executemany(
+            "INSERT INTO payments (tenant_id, amount) VALUES (?, ?)",
+            [(1, 8000.00), (1, 8000.00), (2, 12000.00), (3, 500.00)]
+        )
+        self.conn.commit()
+        
+        totals = database.get_totals_for_tenants([1, 2, 4])
+        self.assertEqual(totals, {1: 16000.00, 2: 12000.00},
+                         "Only requested tenants with payments should be returned")
+    
+    def test_05_background_read(self):
+        """Test that submit_read runs off the calling thread with its own connection"""
+        print("\n✅ Test: Background Read")
+        
+        def query(conn):
+            return conn, threading.current_thread(), conn.execute("SELECT unit_number FROM units").fetchall()
+        
+        conn, thread, rows = database.submit_read(query).result(timeout=5)
+        self.assertEqual(rows, [("101",)], "Worker should see committed rows")
+        self.assertIsNot(thread, threading.current_thread(), "Query should run on the worker thread")
+        self.assertIsNot(conn, self.conn, "Worker should use its own connection")
+    
+    def test_06_cached_rows_expire(self):
+        """Test that cached rows with a ttl are refetched once it passes"""
+        print("\n✅ Test: Query Cache TTL")
+        
+        sql = "SELECT COUNT(*) FROM units"
+        self.assertEqual(database.cached_query(sql, tables=("units",), ttl=0.05), [(1,)])
+        self.conn.execute("INSERT INTO units (unit_number) VALUES ('102')")
+        self.conn.commit()
+        self.assertEqual(database.cached_query(sql, tables=("units",), ttl=0.05), [(1,)],
+                         "Rows should be reused before the ttl passes")
+        
+        time.sleep(0.1)
+        self.assertEqual(database.cached_query(sql, tables=("units",), ttl=0.05), [(2,)],
+                         "Rows should be refetched after the ttl passes")
+    
+    def test_07_schema_version(self):
+        """Test that create_database records the schema version and skips it next time"""
+        print("\n✅ Test: Schema Version Gate")
+        
+        TestDatabaseOperations._cleanup_database()
+        database.close_connection()
+        conn, cur = database.create_database()
+        self.assertIsNotNone(conn, "Schema should be created")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, database.SCHEMA_VERSION, "Schema version should be recorded")
+        conn.execute("DROP TABLE apartment_stats")
+        conn.commit()
+        conn.close()
+        
+        conn, cur = database.create_database()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        self.assertNotIn("apartment_stats", tables, "Current schema should not be re-run")
+    
+    def test_08_table_versions(self):
+        """Test that table versions move only for the invalidated tables"""
+        print("\n✅ Test: Table Versions")
+        
+        before = database.table_versions(("units", "payments"))
+        database.invalidate_cache("payments")
+        after = database.table_versions(("units", "payments"))
+        self.assertEqual(after[0], before[0], "Units version should not change")
+        self.assertEqual(after[1], before[1] + 1, "Payments version should advance")
+    
+    def test_09_baseline_upgrade(self):
+        """Test that a database from the original schema is rebuilt without losing rows"""
+        print("\n✅ Test: Baseline Upgrade")
+        
+        database.close_connection()
+        TestDatabaseOperations._cleanup_database()
+        conn = sqlite3.connect(TEST_DB)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.close()
+        
+        conn, cur = database.create_database()
+        self.assertIsNotNone(conn, "Baseline database should upgrade")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tenants)")]
+        tenants = conn.execute("SELECT id, full_name, unit_id, move_in_date FROM tenants").fetchall()
+        payments = conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+        foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+        conn.close()
+        
+        self.assertNotIn("monthly_rent", columns, "Rent should only be kept on units")
+        self.assertEqual(tenants, [(1, "John Doe", 1, "2024-01-15")], "Tenants should be copied over")
+        self.assertEqual(payments, 1, "Rebuilding tenants should not cascade to payments")
+        self.assertEqual(foreign_keys, 1, "Foreign keys should be back on after the upgrade")
+    
+    def test_10_baseline_upgrade_adds_constraints(self):
+        """Test that an upgraded baseline database rejects an empty name or move-in date
+        and a non-positive payment amount"""
+        print("\n✅ Test: Baseline Upgrade Constraints")
+        
+        database.close_connection()
+        TestDatabaseOperations._cleanup_database()
+        conn = sqlite3.connect(TEST_DB)
+        conn.executescript(BASELINE_SCHEMA)
+        # Rows the original schema accepted but the current one would not
+        conn.execute("INSERT INTO tenants (full_name, move_in_date) VALUES ('', NULL)")
+        conn.execute("INSERT INTO tenants (full_name, move_in_date) VALUES ('Jane Doe', '2024-01-15 09:30')")
+        conn.execute("INSERT INTO payments (tenant_id, amount, payment_date) VALUES (1, 0, '2024-03-01')")
+        conn.commit()
+        conn.close()
+        conn, cur = database.create_database()
+        self.assertIsNotNone(conn, "Baseline rows that break the constraints should not block the upgrade")
+        conn.close()
+        
+        names, dates = zip(*database.get_connection().execute(
+            "SELECT full_name, move_in_date FROM tenants ORDER BY id"))
+        self.assertNotIn("", names, "Empty names should be replaced during the upgrade")
+        self.assertEqual(dates[2], "2024-01-15", "Dates should be normalized during the upgrade")
+        for name, move_in_date in (("", "2025-01-01"), ("John Doe", ""), ("John Doe", "2025-13-01"),
+                                   ("John Doe", "01/15/2025")):
+            with self.assertRaises(sqlite3.IntegrityError, msg=f"{name!r}, {move_in_date!r} should be refused"):
+                database.register_tenant(name, None, None, 2, move_in_date)
+        
+        amounts = [amount for amount, in database.get_connection().execute("SELECT amount FROM payments ORDER BY id")]
+        self.assertEqual(amounts, [8800.00, 0], "Existing payments should be copied unchanged")
+        for amount in (0, -100.00):
+            with self.assertRaises(sqlite3.IntegrityError, msg=f"Amount {amount} should be refused"):
+                database.add_payments_bulk([(1, amount, "2025-01-01", "2025-01")])
+    
+    def test_11_baseline_upgrade_new_unit_dates(self):
+        """Test that units added to an upgraded baseline database get a created date"""
+        print("\n✅ Test: Baseline Upgrade Unit Dates")
+        
+        database.close_connection()
+        TestDatabaseOperations._cleanup_database()
+        conn = sqlite3.connect(TEST_DB)
+        conn.executescript(BASELINE_SCHEMA)
+        conn.close()
+        conn, cur = database.create_database()
+        conn.close()
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        row = database.add_unit("999", "Studio", 5000.00)
+        self.assertEqual(row[5], today, "add_unit should stamp today's date")
+        database.add_units_bulk([("998", "Studio", 5000.00)])
+        created = database.get_connection().execute(
+            "SELECT created_at FROM units WHERE unit_number = '998'").fetchone()[0]
+        self.assertEqual(created, today, "add_units_bulk should stamp today's date")
+
+
+class TestSchema(unittest.TestCase):
+    """Test the full schema from create_database and the write helpers built on it"""
+    
+    def setUp(self):
+        """Build the real schema in a fresh test database and share its connection"""
+        TestDatabaseOperations._cleanup_database()
+        self.original_db_name = database.DB_NAME
+        database.DB_NAME = TEST_DB
+        conn, cur = database.create_database()
+        conn.close()
+        self.conn = database.get_connection()
+    
+    def tearDown(self):
+        """Close the shared connection and restore the real database name"""
+        database.close_connection()
+        database.DB_NAME = self.original_db_name
+        time.sleep(0.05)
+        TestDatabaseOperations._cleanup_database()
+    
+    def assert_stats_match(self, msg):
+        """Compare the trigger-maintained apartment_stats row with totals recomputed from the base tables"""
+        stats = self.conn.execute(
+            "SELECT occupied_count, payment_count, total_amount, total_electric, total_water "
+            "FROM apartment_stats WHERE id = 1"
+        ).fetchone()
+        expected = self.conn.execute('''
+            SELECT (SELECT COUNT(*) FROM units WHERE is_occupied = 1), COUNT(*), COALESCE(SUM(amount), 0),
+                   COALESCE(SUM(electric_bill), 0), COALESCE(SUM(water_bill), 0)
+            FROM payments
+        ''').fetchone()
+        self.assertEqual(stats, expected, msg)
+    
+    def test_01_add_unit_returns_row(self):
+        """Test that add_unit returns the stored UNIT_COLUMNS row with and without RETURNING"""
+        print("\n✅ Test: Add Unit Row")
+        
+        select = f"SELECT {database.UNIT_COLUMNS} FROM units WHERE id = ?"
+        for has_returning, number in ((True, "101"), (False, "102")):
+            with mock.patch.object(database, "HAS_RETURNING", has_returning):
+                row = database.add_unit(number, "Studio", 8000.00)
+            self.assertEqual(row[1:5], (number, "Studio", 8000.00, "No"),
+                             f"Row should follow UNIT_COLUMNS (RETURNING={has_returning})")
+            stored = self.conn.execute(select, (row[0],)).fetchone()
+            self.assertEqual(row, stored, f"Row should match the stored unit (RETURNING={has_returning})")
+    
+    def test_02_register_tenant(self):
+        """Test that register_tenant stores the tenant and the trigger occupies the unit"""
+        print("\n✅ Test: Register Tenant")
+        
+        unit_id = database.add_unit("101", "Studio", 8000.00)[0]
+        tenant_id = database.register_tenant("John Doe", "john@email.com", None, unit_id, "2025-01-01")
+        
+        tenant = self.conn.execute(
+            "SELECT full_name, email, phone, unit_id, move_in_date FROM tenants WHERE id = ?", (tenant_id,)
+        ).fetchone()
+        self.assertEqual(tenant, ("John Doe", "john@email.com", None, unit_id, "2025-01-01"),
+                         "Tenant should be stored as given")
+        occupied = self.conn.execute("SELECT is_occupied FROM units WHERE id = ?", (unit_id,)).fetchone()[0]
+        self.assertEqual(occupied, 1, "Trigger should mark the unit occupied")
+    
+    def test_03_register_tenant_unavailable_unit(self):
+        """Test that register_tenant refuses occupied and missing units without inserting"""
+        print("\n✅ Test: Register Tenant Unavailable Unit")
+        
+        unit_id = database.add_unit("101", "Studio", 8000.00)[0]
+        database.register_tenant("John Doe", None, None, unit_id, "2025-01-01")
+        
+        with self.assertRaises(ValueError, msg="Occupied unit should be refused"):
+            database.register_tenant("Jane Doe", None, None, unit_id, "2025-02-01")
+        with self.assertRaises(ValueError, msg="Missing unit should be refused"):
+            database.register_tenant("Jane Doe", None, None, unit_id + 1, "2025-02-01")
+        count = self.conn.execute("SELECT COUNT(*) FROM tenants").fetchone()[0]
+        self.assertEqual(count, 1, "Refused registrations should not insert a tenant")
+    
+    def test_04_occupied_count_follows_units(self):
+        """Test the occupied counter through unit inserts, deletes and occupancy flips"""
+        print("\n✅ Test: Occupied Count (units)")
+        
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO units (unit_number, unit_type, monthly_rent, is_occupied) VALUES (?, ?, ?, ?)",
+                [("101", "Studio", 8000.00, 1), ("102", "Studio", 8000.00, 0), ("103", "Studio", 8000.00, 1)]
+            )
+        self.assert_stats_match("Unit inserts should update the occupied count")
+        
+        with self.conn:
+            self.conn.execute("UPDATE units SET is_occupied = 1 WHERE unit_number = '102'")
+            self.conn.execute("UPDATE units SET is_occupied = 0 WHERE unit_number = '101'")
+            self.conn.execute("UPDATE units SET is_occupied = 0 WHERE unit_number = '101'")
+        self.assert_stats_match("Occupancy flips should update the occupied count")
+        
+        with self.conn:
+            self.conn.execute("DELETE FROM units WHERE unit_number IN ('101', '103')")
+        self.assert_stats_match("Unit deletes should update the occupied count")
+    
+    def test_05_occupied_count_follows_tenants(self):
+        """Test the occupied counter through tenant inserts, moves and deletes"""
+        print("\n✅ Test: Occupied Count (tenants)")
+        
+        first = database.add_unit("101", "Studio", 8000.00)[0]
+        second = database.add_unit("102", "Studio", 8000.00)[0]
+        tenant_id = database.register_tenant("John Doe", None, None, first, "2025-01-01")
+        self.assert_stats_match("Tenant insert should occupy the unit")
+        
+        with self.conn:
+            self.conn.execute("UPDATE tenants SET unit_id = ? WHERE id = ?", (second, tenant_id))
+        self.assert_stats_match("Moving a tenant should free one unit and occupy the other")
+        
+        with self.conn:
+            self.conn.execute("DELETE FROM tenants WHERE id = ?", (tenant_id,))
+        self.assert_stats_match("Tenant delete should free the unit")
+        
+        database.register_tenant("Jane Doe", None, None, first, "2025-02-01")
+        with self.conn:
+            self.conn.execute("DELETE FROM units WHERE id = ?", (first,))
+        self.assert_stats_match("Deleting an occupied unit should unassign its tenant and drop the count")
+    
+    def test_06_schema_upgrade_replaces_triggers(self):
+        """Test that re-running the schema replaces an outdated trigger body"""
+        print("\n✅ Test: Trigger Replacement")
+        
+        with self.conn:
+            self.conn.execute("DROP TRIGGER count_occupied_on_unit_insert")
+            self.conn.execute('''CREATE TRIGGER count_occupied_on_unit_insert AFTER INSERT ON units
+                                 BEGIN SELECT 1; END''')
+            self.conn.execute("PRAGMA user_version = 0")
+        database.close_connection()
+        conn, cur = database.create_database()
+        conn.close()
+        self.conn = database.get_connection()
+        
+        database.add_unit("101", "Studio", 8000.00)
+        with self.conn:
+            self.conn.execute("UPDATE units SET is_occupied = 1")
+            self.conn.execute("INSERT INTO units (unit_number, is_occupied) VALUES ('102', 1)")
+        self.assert_stats_match("The current trigger body should be in place after the upgrade")
+    
+    def test_07_payment_totals(self):
+        """Test the payment totals through inserts, updates and deletes"""
+        print("\n✅ Test: Payment Totals")
+        
+        unit_id = database.add_unit("101", "Studio", 8000.00)[0]
+        tenant_id = database.register_tenant("John Doe", None, None, unit_id, "2025-01-01")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO payments (tenant_id, amount, electric_bill, water_bill, payment_date, month_covered) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(tenant_id, 8800.00, 500.00, 300.00, "2025-01-01", "2025-01"),
+                 (tenant_id, 8000.00, None, None, "2025-02-01", "2025-02")]
+            )
+        self.assert_stats_match("Payment inserts should add to the totals")
+        
+        with self.conn:
+            self.conn.execute("UPDATE payments SET amount = 9000.50, electric_bill = 700.25 "
+                              "WHERE month_covered = '2025-01'")
+            self.conn.execute("UPDATE payments SET water_bill = 250.00 WHERE month_covered = '2025-02'")
+            self.conn.execute("UPDATE payments SET month_covered = '2025-03' WHERE month_covered = '2025-02'")
+        self.assert_stats_match("Amount, bill and month updates should keep the totals right")
+        
+        with self.conn:
+            self.conn.execute("DELETE FROM payments WHERE month_covered = '2025-03'")
+        self.assert_stats_match("Payment deletes should subtract from the totals")
+    
+    def test_08_payment_totals_on_tenant_cascade(self):
+        """Test that payments removed by the tenant cascade come off the totals"""
+        print("\n✅ Test: Payment Totals (cascade)")
+        
+        unit_id = database.add_unit("101", "Studio", 8000.00)[0]
+        tenant_id = database.register_tenant("John Doe", None, None, unit_id, "2025-01-01")
+        other_unit = database.add_unit("102", "Studio", 8000.00)[0]
+        other_id = database.register_tenant("Jane Doe", None, None, other_unit, "2025-01-01")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO payments (tenant_id, amount, electric_bill, water_bill, payment_date, month_covered) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(tenant_id, 8800.00, 500.00, 300.00, "2025-01-01", "2025-01"),
+                 (tenant_id, 8800.00, 500.00, 300.00, "2025-02-01", "2025-02"),
+                 (other_id, 8000.00, None, None, "2025-01-05", "2025-01")]
+            )
+        
+        with self.conn:
+            self.conn.execute("DELETE FROM tenants WHERE id = ?", (tenant_id,))
+        remaining = self.conn.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+        self.assertEqual(remaining, 1, "Only the deleted tenant's payments should cascade")
+        self.assert_stats_match("Cascaded payment deletes should subtract from the totals")
+    
+    def test_09_bulk_inserts(self):
+        """Test that the bulk helpers insert every row and invalidate the tables they write"""
+        print("\n✅ Test: Bulk Inserts")
+        
+        count_units = "SELECT COUNT(*) FROM units"
+        self.assertEqual(database.cached_query(count_units, tables=("units",)), [(0,)])
+        versions = database.table_versions(("units", "tenants", "payments"))
+        
+        database.add_units_bulk([("101", "Studio", 8000.00), ("102", "Studio", 8000.00), ("103", "Studio", 9000.00)])
+        self.assertEqual(database.cached_query(count_units, tables=("units",)), [(3,)],
+                         "Adding units should invalidate cached unit queries")
+        database.add_tenants_bulk([("John Doe", None, None, "2025-01-01", 1), ("Jane Doe", None, None, "2025-01-01", 2)])
+        database.add_payments_bulk([(1, 8000.00, "2025-01-01", "2025-01"), (2, 8000.00, "2025-01-02", "2025-01"),
+                                    (2, 8000.00, "2025-02-02", "2025-02")])
+        
+        counts = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM units), (SELECT COUNT(*) FROM tenants), (SELECT COUNT(*) FROM payments)"
+        ).fetchone()
+        self.assertEqual(counts, (3, 2, 3), "Every row of each batch should be inserted")
+        after = database.table_versions(("units", "tenants", "payments"))
+        self.assertTrue(all(new > old for new, old in zip(after, versions)), "Each written table should be invalidated")
+        self.assert_stats_match("Bulk inserts should keep apartment_stats in step")
+    
+    def test_10_bulk_inserts_roll_back(self):
+        """Test that a batch with one bad row inserts nothing"""
+        print("\n✅ Test: Bulk Insert Rollback")
+        
+        database.add_units_bulk([("101", "Studio", 8000.00), ("102", "Studio", 8000.00)])
+        before = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM units), (SELECT COUNT(*) FROM tenants), (SELECT COUNT(*) FROM payments)"
+        ).fetchone()
+        
+        with self.assertRaises(sqlite3.IntegrityError, msg="Duplicate unit number should fail the batch"):
+            database.add_units_bulk([("103", "Studio", 8000.00), ("101", "Studio", 8000.00)])
+        with self.assertRaises(sqlite3.IntegrityError, msg="Empty tenant name should fail the batch"):
+            database.add_tenants_bulk([("John Doe", None, None, "2025-01-01", 1), ("", None, None, "2025-01-01", 2)])
+        database.register_tenant("John Doe", None, None, 1, "2025-01-01")
+        with self.assertRaises(sqlite3.IntegrityError, msg="Zero amount should fail the batch"):
+            database.add_payments_bulk([(1, 8000.00, "2025-01-01", "2025-01"), (1, 0, "2025-02-01", "2025-02")])
+        
+        after = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM units), (SELECT COUNT(*) FROM tenants), (SELECT COUNT(*) FROM payments)"
+        ).fetchone()
+        self.assertEqual(after, (before[0], before[1] + 1, before[2]),
+                         "Failed batches should leave no rows behind")
+        occupied = self.conn.execute("SELECT is_occupied FROM units WHERE id = 2").fetchone()[0]
+        self.assertEqual(occupied, 0, "A rolled-back tenant batch should not occupy its units")
+        self.assert_stats_match("Failed batches should leave apartment_stats unchanged")
+
+
+
 def run_tests():
     """Run all tests with detailed output"""
     print("\n" + "="*60)
@@ -443,6 +912,8 @@ def run_tests():
     # Add all test classes
     suite.addTests(loader.loadTestsFromTestCase(TestDatabaseOperations))
     suite.addTests(loader.loadTestsFromTestCase(TestLoginValidation))
+    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseModule))
+    suite.addTests(loader.loadTestsFromTestCase(TestSchema))
     
     # Run tests with verbose output
     runner = unittest.TextTestRunner(verbosity=2)